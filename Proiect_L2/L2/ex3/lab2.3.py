@@ -8,24 +8,30 @@
 #thus your chart in the case of DNA should have 4 lines which reflect the 
 #values found over the sequence
 
+import os
+import sys
 from tkinter import filedialog
-from tkinter import Tk, Label, Button, messagebox
+from tkinter import Tk, Label, Button
 import matplotlib.pyplot as plt
+import numpy as np
 
-def relative_frequencies(sequence, window_size):
-    bases = ['A', 'T', 'C', 'G']
-    freq = {base: [] for base in bases}
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from seqtools.fasta import read_fasta
+from seqtools.normalize import clean_sequence
+from seqtools.plotting import plot_envelope
+from seqtools.tkworker import JobPanel
+from seqtools.windows import BASE_ORDER, stream_profile, window_frequencies
 
-    for i in range(len(sequence) - window_size + 1):
-        window = sequence[i:i+window_size]
-        for base in bases:
-            freq[base].append(round(window.count(base) / window_size, 4))
+PLOT_POINTS = 200_000
 
-    return freq
+def relative_frequencies(sequence, window_size, step=1):
+    # one float32 column per base, all windows at once from prefix sums
+    table = window_frequencies(sequence, window_size, step)
+    return {base: table[:, BASE_ORDER.index(base)] for base in ['A', 'T', 'C', 'G']}
 
-def show_chart(freq):
-    for base in freq:
-        plt.plot(freq[base], label=base)
+def show_chart(positions, low, high):
+    for base in low:
+        plot_envelope(low[base], high[base], positions, label=base)
     plt.title("Relative Frequencies of A, T, C, G (Window = 30)")
     plt.xlabel("Window Start Position")
     plt.ylabel("Relative Frequency")
@@ -34,29 +40,43 @@ def show_chart(freq):
     plt.tight_layout()
     plt.show()
 
-def open_file():
-    filepath = filedialog.askopenfilename(filetypes=[("FASTA files", "*.fasta *.fa *.txt")])
-    if not filepath:
-        return
-    try:
-        with open(filepath, "r") as file:
-            lines = file.readlines()
-            sequence = "".join([line.strip().upper() for line in lines if not line.startswith(">")])
-            sequence = "".join([base for base in sequence if base in ['A', 'T', 'C', 'G']])
+def analyze_file(job, filepath):
+    job.progress(0, "Reading FASTA file...")
+    sequence = clean_sequence(read_fasta(filepath))
+    job.check()
+
+    if len(sequence) < 30:
+        raise ValueError("Sequence too short.")
+
+    # streamed in chunks; long genomes are reduced to the min and max of at
+    # most PLOT_POINTS bins so the profile never has to be held in full
+    job.progress(0, "Computing sliding window frequencies...")
+    n_windows = len(sequence) - 30 + 1
+    bin_size = -(-n_windows // PLOT_POINTS)
 
-            if len(sequence) < 30:
-                messagebox.showerror("Error", "Sequence too short.")
-                return
+    def chunk_done(done):
+        job.check()
+        job.progress(done / n_windows * 100)
 
-            freq = relative_frequencies(sequence, 30)
-            show_chart(freq)
+    _, bins = stream_profile(sequence, 30, window_frequencies, bin_size=bin_size,
+                             callback=chunk_done)
+    positions = np.arange(len(bins["min"])) * bin_size
+    low = {base: bins["min"][:, BASE_ORDER.index(base)] for base in ['A', 'T', 'C', 'G']}
+    high = {base: bins["max"][:, BASE_ORDER.index(base)] for base in ['A', 'T', 'C', 'G']}
+    return positions, low, high
 
-    except Exception as e:
-        messagebox.showerror("Error", f"Failed to process file:\n{e}")
+def on_done(result):
+    show_chart(*result)
+
+def open_file():
+    filepath = filedialog.askopenfilename(filetypes=[("FASTA files", "*.fasta *.fa *.txt *.gz")])
+    if not filepath:
+        return
+    panel.run(analyze_file, (filepath,), on_done)
 
 root = Tk()
 root.title("Sliding Window A/T/C/G")
-root.geometry("400x200")
+root.geometry("400x300")
 
 label = Label(root, text="Select a FASTA file to analyze", font=("Arial", 12))
 label.pack(pady=20)
@@ -64,4 +84,6 @@ label.pack(pady=20)
 button = Button(root, text="Open FASTA File", font=("Arial", 12), command=open_file)
 button.pack()
 
+panel = JobPanel(root, button)
+
 root.mainloop()
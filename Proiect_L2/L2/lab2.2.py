@@ -1,16 +1,16 @@
 #Find in sequence S only the dinucleotides and trinucleotides that exists, 
 #without the use of brute force. In order to achieve the results one must verify 
 #this combinations starting from the beg. of the seq.
-def percentage(S, length):
-    freq = {}
-    total = len(S) - length + 1
 
-    for i in range(total):
-        part = S[i:i+length]
-        if part in freq:
-            freq[part] += 1
-        else:
-            freq[part] = 1
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from seqtools.kmers import kmer_dict
+
+def percentage(S, length, canonical=False):
+    freq = kmer_dict(S, length, first_seen=True, canonical=canonical)
+    total = len(S) - length + 1
 
     for part in freq:
         freq[part] = round((freq[part] / total) * 100, 2)
@@ -1,16 +1,14 @@
+import os
+import sys
 from itertools import product
 
-def percentage(S, length):
-    freq = {}
-    total = len(S) - length + 1 
-    for i in range (total):
-        part = S[i:i+length]
-        if part in freq:
-            freq[part]+=1
-        else:
-            freq[part] = 1
-            
-    return freq
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from seqtools.kmers import kmer_dicts
+
+def percentages(S, lengths, canonical=False):
+    # counts for every length from one scan of S; canonical=True counts
+    # each k-mer together with its reverse complement
+    return kmer_dicts(S, lengths, canonical=canonical)
 
 S = "TACGTGCGCGCGAGCTATCTACTGACTTACGACTAGTGTAGCTGCATCATCGATCGA"
 nucleotides = ['A', 'C', 'G', 'T']
@@ -20,12 +18,11 @@ trinucleotides = [''.join(p) for p in product(nucleotides, repeat = 3)]
 print("Dinucleotides: ", dinucleotides)
 print("Trinucleotides: ", trinucleotides)
 
-percentage_din = percentage(S, 2)
+percentage_din, percentage_trin = percentages(S, (2, 3)).values()
 print("Percentages for dinucleotides: ")
 for i in sorted(percentage_din):
     print(f"{i}:  {percentage_din[i]}%")
     
-percentage_trin = percentage(S, 3)
 print("Percentages for trinucleotides: ")
 for i in sorted(percentage_trin):
     print(f"{i}:  {percentage_trin[i]}%")
\ No newline at end of file
@@ -1,16 +1,12 @@
 import os
+import sys
 import matplotlib.pyplot as plt
 
-W = 30
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from seqtools.cache import load_genome
+from seqtools.batch import map_genomes
 
-def read_fasta(path):
-    seq = []
-    with open(path) as f:
-        for line in f:
-            line = line.strip()
-            if not line.startswith(">"):
-                seq.append(line.upper())
-    return "".join(seq)
+W = 30
 
 def CG_content(win):
     c = win.count("C")
@@ -44,6 +40,9 @@ def compute_pattern(seq, w):
     cy = sum(ys)/len(ys)
     return xs, ys, cx, cy
 
+def genome_pattern(path):
+    return compute_pattern(load_genome(path), W)
+
 def main():
 
     root = os.getcwd()
@@ -56,12 +55,9 @@ def main():
     plt.grid(True)
     for folder in folders:
         folder_path = os.path.join(root, folder)
-        for file in os.listdir(folder_path):
-            if not file.lower().endswith(".fasta"):
-                continue 
-            fpath = os.path.join(folder_path, file)
-            seq = read_fasta(fpath)
-            xs, ys, cx, cy = compute_pattern(seq, W)
+        files = [f for f in os.listdir(folder_path) if f.lower().endswith((".fasta", ".fasta.gz"))]
+        paths = [os.path.join(folder_path, f) for f in files]
+        for file, (xs, ys, cx, cy) in zip(files, map_genomes(genome_pattern, paths)):
             centers.append((cx, cy, file.replace(".fasta","")))
             plt.scatter(xs, ys, alpha=0.45, s=8, label=file)
 
@@ -11,22 +11,18 @@
 #NNOTE Please do not use the shortcuts given by AI, use NATIVE CODE 
 
 import os
+import sys
 import math
 import time
 import matplotlib.pyplot as plt
 import numpy as np 
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from seqtools.cache import load_genome
+
 PATH_INFLUENZA = "influenza_ref.fasta" 
 PATH_COVID = "covid_ref.fasta"
 
-def read_fasta_native(filepath):
-    sequence = ""
-    with open(filepath, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if not line.startswith(">"):
-                sequence += line.upper()
-    return sequence
-
 def smith_waterman_kernel(seq1, seq2, match=3, mismatch=-3, gap=-2):
     rows = len(seq1) + 1
     cols = len(seq2) + 1
@@ -74,8 +70,8 @@ def layered_alignment_simulation(genome_a, genome_b, window_size=100, step=50):
     return similarity_map
 
 if __name__ == "__main__":
-    seq_flu = read_fasta_native(PATH_INFLUENZA)   
-    seq_cov = read_fasta_native(PATH_COVID)
+    seq_flu = load_genome(PATH_INFLUENZA)   
+    seq_cov = load_genome(PATH_COVID)
     result_matrix = layered_alignment_simulation(seq_flu, seq_cov, window_size=150, step=100)
 
     plt.figure(figsize=(10, 8))
@@ -3,25 +3,21 @@
 #Implement each of these scoring ecuations in your current implementations
 
 import os
+import sys
 import math
 import time
 import matplotlib.pyplot as plt
 import numpy as np
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from seqtools.cache import load_genome
+
 PATH_INFLUENZA = "influenza_ref.fasta" 
 PATH_COVID = "covid_ref.fasta"
 MATCH_REWARD = 3
 MISMATCH_PENALTY = -3
 GAP_PENALTY = -2
 
-def read_fasta_native(filepath):
-    if not os.path.exists(filepath): return None
-    sequence = ""
-    with open(filepath, 'r') as f:
-        for line in f:
-            if not line.startswith(">"): sequence += line.strip().upper()
-    return sequence
-
 def smith_waterman_kernel_raw(seq1, seq2):
     rows, cols = len(seq1) + 1, len(seq2) + 1
     matrix = [[0] * cols for _ in range(rows)]
@@ -86,8 +82,8 @@ def run_simulation_with_metrics(genome_a, genome_b, window_size=150, step=100):
 
 if __name__ == "__main__":
 
-    seq_flu = read_fasta_native(PATH_INFLUENZA)
-    seq_cov = read_fasta_native(PATH_COVID)
+    seq_flu = load_genome(PATH_INFLUENZA)
+    seq_cov = load_genome(PATH_COVID)
 
     mat_raw, mat_norm, mat_z = run_simulation_with_metrics(seq_flu, seq_cov, window_size=150, step=100)
 
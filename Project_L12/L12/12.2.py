@@ -5,8 +5,16 @@
 
 import math
 import os
+import sys
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from seqtools.cache import load_genome
+from seqtools.batch import map_genomes
+from seqtools.normalize import mask_sequence, clean_windows
+from seqtools.plotting import plot_signal
+
+
 BASES = "ACGT"
 NULL_P = 0.25
 L = 9
@@ -46,45 +54,40 @@ def score_window(window, logll):
         s += v
     return s
 
-def read_fasta(path):
-    seq = []
-    with open(path) as f:
-        for line in f:
-            if not line.startswith(">"):
-                seq.append(line.strip().upper())
-    return "".join(seq)
-
 counts = build_count_matrix(MOTIFS)
 freqs = build_relative_freq_matrix(counts, len(MOTIFS))
 logll = build_log_likelihood_matrix(freqs)
 
 threshold = min(score_window(m, logll) for m in MOTIFS)
-print("Threshold:", round(threshold, 3))
 
-for fname in sorted(os.listdir(FASTA_DIR)):
-    if not fname.endswith(".fasta"):
-        continue
-
-    path = os.path.join(FASTA_DIR, fname)
-    seq = read_fasta(path)
+def scan_genome(path):
+    seq, mask = mask_sequence(load_genome(path))
+    valid = clean_windows(mask, L)
 
     scores = []
     for i in range(len(seq) - L + 1):
-        w = seq[i:i+L]
-        if any(c not in BASES for c in w):
+        if not valid[i]:
             scores.append(0.0)
         else:
-            scores.append(score_window(w, logll))
+            scores.append(score_window(seq[i:i+L], logll))
+    return scores
+
+if __name__ == "__main__":
+    print("Threshold:", round(threshold, 3))
+
+    fnames = sorted(f for f in os.listdir(FASTA_DIR) if f.endswith((".fasta", ".fasta.gz")))
+    paths = [os.path.join(FASTA_DIR, f) for f in fnames]
 
-    best_idx = max(range(len(scores)), key=lambda i: scores[i])
-    best_score = scores[best_idx]
+    for fname, scores in zip(fnames, map_genomes(scan_genome, paths)):
+        best_idx = max(range(len(scores)), key=lambda i: scores[i])
+        best_score = scores[best_idx]
 
-    print(f"{fname}: best score = {best_score:.3f} at position {best_idx}")
+        print(f"{fname}: best score = {best_score:.3f} at position {best_idx}")
 
-    plt.figure()
-    plt.plot(scores)   
-    plt.axhline(threshold, color="red", linestyle="--", linewidth=1.5, label="Threshold")
-    plt.xlabel("Sliding window start index")
-    plt.ylabel("Log-likelihood score")
-    plt.title(fname)
-    plt.show()
+        plt.figure()
+        plot_signal(scores)
+        plt.axhline(threshold, color="red", linestyle="--", linewidth=1.5, label="Threshold")
+        plt.xlabel("Sliding window start index")
+        plt.ylabel("Log-likelihood score")
+        plt.title(fname)
+        plt.show()
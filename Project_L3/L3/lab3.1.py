@@ -8,8 +8,18 @@
 # Tm = 81.5 + 16.6(log10([Na+])) + .41*(%GC) – 600/length
 # where Na+ is the concentration of the solution and has a value of 0.001 
 # Input 6-12 letters
+# Primer discovery mode: python lab3.1.py genome.fasta scans every 18-25 bp
+# window of the genome on both strands and prints the best primer pairs.
 
+import bisect
 import math 
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from seqtools.fasta import iter_fasta
+from seqtools.normalize import mask_sequence
+from seqtools.primers import find_primers, pair_primers, primer_sequence
 
 def basic_tm(S):
     Tm = 4 * (S.count('G') + S.count('C')) + 2 * (S.count('A') + S.count('T'))
@@ -24,8 +34,41 @@ def advanced_tm(S):
     tm = 81.5 + 16.6 * log_na + 0.41 * gc_perc - (600 / length)
     return round(tm, 2)
 
-S = 'TCCAGACGACTA'
+def read_records(path):
+    # the records joined with one N between them, so no primer spans two
+    # records, plus each record's name and start in the joined sequence;
+    # N/IUPAC symbols stay in place (and are filtered out) so positions match the file
+    names, starts, parts = [], [], []
+    offset = 0
+    for name, seq in iter_fasta(path):
+        sequence, _ = mask_sequence(seq)
+        names.append(name.split()[0])
+        starts.append(offset)
+        parts.append(sequence)
+        offset += len(sequence) + 1
+    return "N".join(parts), names, starts
+
+def discover_primers(path, top=10):
+    sequence, names, starts = read_records(path)
+    candidates = find_primers(sequence)
+    pairs = pair_primers(candidates, record_starts=starts)
+    print(f"{len(candidates)} primer candidates, {len(pairs)} pairs kept")
+    for pair in pairs[:top]:
+        fwd = candidates[pair["forward"]]
+        rev = candidates[pair["reverse"]]
+        # positions within the record
+        record = bisect.bisect_right(starts, int(fwd['start'])) - 1
+        offset = starts[record]
+        print(f"{names[record]} "
+              f"F {fwd['start'] - offset:>9} {primer_sequence(sequence, fwd):25} Tm {fwd['tm']:.1f} °C   "
+              f"R {rev['start'] - offset:>9} {primer_sequence(sequence, rev):25} Tm {rev['tm']:.1f} °C   "
+              f"product {pair['product']} bp")
+
+if len(sys.argv) > 1:
+    discover_primers(sys.argv[1])
+else:
+    S = 'TCCAGACGACTA'
 
-print('The basic formula for Tm [Tm = 4 * (G + C) + 2 * (A + T)] has the following result:', basic_tm(S), '°C')
+    print('The basic formula for Tm [Tm = 4 * (G + C) + 2 * (A + T)] has the following result:', basic_tm(S), '°C')
 
-print('\nThe advanced formula for Tm [Tm = 81.5 + 16.6(log10([Na+])) + .41*(%GC) – 600/length] has the following result:', advanced_tm(S), '°C')
+    print('\nThe advanced formula for Tm [Tm = 81.5 + 16.6(log10([Na+])) + .41*(%GC) – 600/length] has the following result:', advanced_tm(S), '°C')
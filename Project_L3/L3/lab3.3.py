@@ -5,44 +5,47 @@
 # signal that are above the trashold signal are shown as a horizontal line over the sequence
 # Wherever the signal is bellow the trashold the chart should show empty space
 
-from tkinter import filedialog, Tk, Label, Button, Entry, messagebox
+from tkinter import filedialog, Tk, Label, Button, Entry, Checkbutton, BooleanVar, messagebox
 import matplotlib.pyplot as plt
-import math
-
-def basic_tm(S):
-    A = S.count('A')
-    T = S.count('T')
-    G = S.count('G')
-    C = S.count('C')
-    return 4 * (G + C) + 2 * (A + T)
-
-def advanced_tm(S):
-    na = 0.001
-    length = len(S)
-    if length == 0:
-        return None
-    gc_count = S.count('G') + S.count('C')
-    gc_perc = (gc_count / length) * 100
-    log_na = math.log10(na)
-    tm = 81.5 + 16.6 * log_na + 0.41 * gc_perc - (600 / length)
-    return round(tm, 2)
-
-def calculate_tm_signals(sequence, window_size=9):
-    tm_basic = []
-    tm_advanced = []
-
-    for i in range(len(sequence) - window_size + 1):
-        window = sequence[i:i+window_size]
-        tm_basic.append(basic_tm(window))
-        tm_advanced.append(advanced_tm(window))
-
-    return tm_basic, tm_advanced
-
-def show_main_chart(tm_basic, tm_advanced, threshold):
-    x = list(range(len(tm_basic)))
+import numpy as np
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from seqtools.fasta import iter_fasta
+from seqtools.intervals import threshold_intervals, write_bed
+from seqtools.normalize import mask_sequence
+from seqtools.plotting import plot_signal
+from seqtools.tkworker import JobPanel
+from seqtools.tm import nearest_neighbor_tm, tm_profiles
+
+def calculate_tm_signals(sequence, window_size=9, na=0.05, strand_conc=250e-9):
+    # Wallace from cumulative GC/AT counts and the SantaLucia nearest-neighbor
+    # Tm from cumulative stack dH/dS, for every window at once
+    tm_basic, _ = tm_profiles(sequence, window_size)
+    tm_nn = nearest_neighbor_tm(sequence, window_size, na, strand_conc)
+    masked = np.isnan(tm_nn)
+    if masked.any():
+        # windows with N have no Wallace Tm either
+        tm_basic = np.where(masked, np.nan, tm_basic)
+    return tm_basic, np.round(tm_nn.astype(np.float64), 2)
+
+def join_records(records):
+    # the signals of all records end to end for the charts, one NaN window
+    # between records so their lines are not joined, plus each record's offset
+    offsets, basic, nn = [], [], []
+    offset = 0
+    for _, tm_basic, tm_nn in records:
+        offsets.append(offset)
+        basic += [tm_basic, [np.nan]]
+        nn += [tm_nn, [np.nan]]
+        offset += len(tm_basic) + 1
+    return np.concatenate(basic[:-1]), np.concatenate(nn[:-1]), offsets
+
+def show_main_chart(tm_basic, tm_nn, threshold):
     plt.figure(figsize=(10, 5))
-    plt.plot(x, tm_basic, label="Wallace Formula", color='blue')
-    plt.plot(x, tm_advanced, label="Nearest Neighbor", color='red')
+    plot_signal(tm_basic, label="Wallace Formula", color='blue')
+    plot_signal(tm_nn, label="Nearest Neighbor", color='red')
     plt.axhline(y=threshold, color='gray', linestyle='--', label=f"Threshold = {threshold}°C")
     plt.title("Melting Temperature Profile (Window = 9)")
     plt.xlabel("Window Start Position")
@@ -53,15 +56,34 @@ def show_main_chart(tm_basic, tm_advanced, threshold):
     plt.tight_layout()
     plt.show()
 
-def show_threshold_chart(tm_basic, tm_advanced, threshold):
-    x = list(range(len(tm_basic)))
+def threshold_regions(tm_basic, tm_nn, threshold, merge_gap=0, min_length=1):
+    # (start, end, max, mean) intervals of every signal, in window positions
+    return {
+        "Wallace": threshold_intervals(tm_basic, threshold, merge_gap, min_length),
+        "NN": threshold_intervals(tm_nn, threshold, merge_gap, min_length),
+    }
 
-    plt.figure(figsize=(10, 5))
-    plt.fill_between(x, threshold, tm_basic, where=[val >= threshold for val in tm_basic],
-                     interpolate=True, color='blue', alpha=0.5, label="Wallace > threshold")
+def shift_regions(regions, offset):
+    return [(start + offset, end + offset, peak, mean) for start, end, peak, mean in regions]
+
+def export_regions(path, record_regions, window_size=9):
+    # record_regions: (chrom, regions) per record, in that record's coordinates
+    with open(path, "w") as f:
+        for chrom, regions in record_regions:
+            for name, intervals in regions.items():
+                write_bed(f, intervals, chrom, window_size, label=name)
 
-    plt.fill_between(x, threshold, tm_advanced, where=[val >= threshold for val in tm_advanced],
-                     interpolate=True, color='red', alpha=0.5, label="NN > threshold")
+def show_threshold_chart(regions, threshold):
+    # one bar per interval, from the threshold up to the interval's maximum
+    colors = {"Wallace": 'blue', "NN": 'red'}
+
+    plt.figure(figsize=(10, 5))
+    for name, intervals in regions.items():
+        if not intervals:
+            continue
+        starts, ends, peaks, _ = np.array(intervals).T
+        plt.bar(starts, peaks - threshold, width=ends - starts, bottom=threshold, align='edge',
+                color=colors[name], alpha=0.5, label=f"{name} > threshold")
 
     plt.axhline(y=threshold, color='gray', linestyle='--', label=f"Threshold = {threshold}°C")
     plt.title("Tm Segments Above Threshold")
@@ -73,41 +95,70 @@ def show_threshold_chart(tm_basic, tm_advanced, threshold):
     plt.tight_layout()
     plt.show()
 
+def analyze_file(job, filepath):
+    # (name, Wallace, NN) per record; N/IUPAC symbols are kept in place so
+    # window positions stay record coordinates (their windows are NaN)
+    records = []
+    for name, seq in iter_fasta(filepath):
+        job.check()
+        sequence, _ = mask_sequence(seq)
+        if len(sequence) < 9:
+            continue
+        job.progress(0, f"Computing Tm signals of {name.split()[0]}...")
+        records.append((name.split()[0], *calculate_tm_signals(sequence, window_size=9)))
+
+    if not records:
+        raise ValueError("Sequence too short. Minimum 9 bases required.")
+    job.progress(100)
+    return records
+
 def open_file():
-    filepath = filedialog.askopenfilename(filetypes=[("FASTA files", "*.fasta *.fa *.txt")])
+    filepath = filedialog.askopenfilename(filetypes=[("FASTA files", "*.fasta *.fa *.txt *.gz")])
     if not filepath:
         return
-    try:
-        with open(filepath, "r") as file:
-            lines = file.readlines()
-            sequence = "".join([line.strip().upper() for line in lines if not line.startswith(">")])
-            sequence = "".join([base for base in sequence if base in ['A', 'T', 'C', 'G']])
-
-            if len(sequence) < 9:
-                messagebox.showerror("Error", "Sequence too short. Minimum 9 bases required.")
-                return
 
-            threshold_input = entry_threshold.get().strip()
-            try:
-                threshold = float(threshold_input)
-            except ValueError:
-                messagebox.showerror("Error", "Invalid threshold. Please enter a number.")
-                return
-
-            tm_basic, tm_advanced =calculate_tm_signals(sequence, window_size=9)
-
-            print(f"Wallace Formula: Min = {min(tm_basic)} °C, Max = {max(tm_basic)} °C")
-            print(f"Nearest Neighbor: Min = {min(tm_advanced)} °C, Max = {max(tm_advanced)} °C")
-
-            show_main_chart(tm_basic, tm_advanced, threshold)
-            show_threshold_chart(tm_basic, tm_advanced, threshold)
+    threshold_input = entry_threshold.get().strip()
+    try:
+        threshold = float(threshold_input)
+    except ValueError:
+        messagebox.showerror("Error", "Invalid threshold. Please enter a number.")
+        return
 
-    except Exception as e:
-        messagebox.showerror("Error", f"Failed to process file:\n{e}")
+    bed_path = None
+    if export_bed.get():
+        stem = os.path.splitext(os.path.basename(filepath))[0]
+        bed_path = filedialog.asksaveasfilename(
+            initialdir=os.path.dirname(filepath), initialfile=f"{stem}_tm_regions.bed",
+            defaultextension=".bed", filetypes=[("BED files", "*.bed")])
+
+    def on_done(records):
+        record_regions = []
+        for chrom, tm_basic, tm_nn in records:
+            print(f"{chrom}:")
+            print(f"Wallace Formula: Min = {np.nanmin(tm_basic)} °C, Max = {np.nanmax(tm_basic)} °C")
+            print(f"Nearest Neighbor: Min = {np.nanmin(tm_nn)} °C, Max = {np.nanmax(tm_nn)} °C")
+
+            regions = threshold_regions(tm_basic, tm_nn, threshold)
+            for name, intervals in regions.items():
+                print(f"{name}: {len(intervals)} regions above {threshold} °C")
+            record_regions.append((chrom, regions))
+        if bed_path:
+            export_regions(bed_path, record_regions)
+
+        tm_basic, tm_nn, offsets = join_records(records)
+        chart_regions = {name: [] for name in record_regions[0][1]}
+        for offset, (_, regions) in zip(offsets, record_regions):
+            for name, intervals in regions.items():
+                chart_regions[name] += shift_regions(intervals, offset)
+
+        show_main_chart(tm_basic, tm_nn, threshold)
+        show_threshold_chart(chart_regions, threshold)
+
+    panel.run(analyze_file, (filepath,), on_done)
 
 root = Tk()
 root.title("DNA Melting Temperature Analyzer")
-root.geometry("500x250")
+root.geometry("500x390")
 
 label = Label(root, text="Select a FASTA file to analyze", font=("Arial", 12))
 label.pack(pady=10)
@@ -122,4 +173,11 @@ entry_threshold = Entry(root, font=("Arial", 11))
 entry_threshold.insert(0, "5")
 entry_threshold.pack()
 
+export_bed = BooleanVar(value=False)
+check_bed = Checkbutton(root, text="Export regions to a BED file", font=("Arial", 11),
+                        variable=export_bed)
+check_bed.pack(pady=5)
+
+panel = JobPanel(root, button)
+
 root.mainloop()
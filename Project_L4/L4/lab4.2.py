@@ -7,31 +7,35 @@
 # E) Formulate a prompt for AI such that the 3 aminoacids are used to ask the AI
 # which foods contain less those aminoacids
 
+import os
+import sys
 from collections import Counter
 import matplotlib.pyplot as plt
-
-def read_fasta(filename):
-    with open(filename, 'r') as f:
-        lines = f.readlines()
-    seq = ''.join([line.strip() for line in lines if not line.startswith('>')])
-    return seq.upper()
-
-def codon_frequencies(seq):
-    codons = [seq[i:i+3] for i in range(0, len(seq)-2, 3) if len(seq[i:i+3]) == 3]
-    return Counter(codons)
-
-def codon_to_aminoacid(codon):
-    table = {
-        'TTT':'F','TTC':'F','TTA':'L','TTG':'L','CTT':'L','CTC':'L','CTA':'L','CTG':'L',
-        'ATT':'I','ATC':'I','ATA':'I','ATG':'M','GTT':'V','GTC':'V','GTA':'V','GTG':'V',
-        'TCT':'S','TCC':'S','TCA':'S','TCG':'S','CCT':'P','CCC':'P','CCA':'P','CCG':'P',
-        'ACT':'T','ACC':'T','ACA':'T','ACG':'T','GCT':'A','GCC':'A','GCA':'A','GCG':'A',
-        'TAT':'Y','TAC':'Y','TAA':'*','TAG':'*','CAT':'H','CAC':'H','CAA':'Q','CAG':'Q',
-        'AAT':'N','AAC':'N','AAA':'K','AAG':'K','GAT':'D','GAC':'D','GAA':'E','GAG':'E',
-        'TGT':'C','TGC':'C','TGA':'*','TGG':'W','CGT':'R','CGC':'R','CGA':'R','CGG':'R',
-        'AGT':'S','AGC':'S','AGA':'R','AGG':'R','GGT':'G','GGC':'G','GGA':'G','GGG':'G'
-    }
-    return table.get(codon, '?')
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from seqtools.codons import (AMINO_ACIDS, CODONS, GENETIC_CODE, aminoacid_counts, codon_counts,
+                             frame_codons)
+from seqtools.fasta import read_fasta
+from seqtools.kmers import encode, unique_counts
+
+def first_seen(seq):
+    # codon codes and amino-acid columns in order of first appearance in frame
+    # +1; Counter.most_common keeps that order between equal counts
+    codons, _, first = unique_counts(frame_codons(encode(seq), 0), first_seen=True)
+    codon_order = codons[np.argsort(first)]
+    aa_order = dict.fromkeys(AMINO_ACIDS.index(GENETIC_CODE[c]) for c in codon_order)
+    return codon_order, list(aa_order)
+
+def as_counter(counts, labels, order=()):
+    # nonzero counts, the indices in `order` first
+    order = list(order)
+    order += [i for i in np.flatnonzero(counts) if i not in order]
+    return Counter({labels[i]: int(counts[i]) for i in order if counts[i]})
+
+def codon_frequencies(seq, frames=("+1",)):
+    # summed over the requested reading frames (see seqtools.codons.FRAMES)
+    return as_counter(codon_counts(seq, frames).sum(axis=0), CODONS, first_seen(seq)[0])
 
 def top_codons(freqs, n=10):
     return freqs.most_common(n)
@@ -54,16 +58,20 @@ def plot_top_codons(freqs, title):
     plt.tight_layout()
     plt.show()
 
-def aminoacid_frequencies(seq):
-    codons = [seq[i:i+3] for i in range(0, len(seq)-2, 3)]
-    aminoacids = [codon_to_aminoacid(c) for c in codons if len(c) == 3]
-    return Counter(aminoacids)
+def aminoacid_frequencies(seq, frames=("+1",)):
+    counts = aminoacid_counts(codon_counts(seq, frames).sum(axis=0))
+    return as_counter(counts, AMINO_ACIDS, first_seen(seq)[1])
 
-covid_seq = read_fasta("covid.fasta")
-flu_seq = read_fasta("influenza.fna")
+def genome_frequencies(path, frames=("+1",)):
+    # all records joined into one sequence, as the lab has always read them
+    seq = read_fasta(path)
+    counts = codon_counts(seq, frames).sum(axis=0)
+    codon_order, aa_order = first_seen(seq)
+    return (as_counter(counts, CODONS, codon_order),
+            as_counter(aminoacid_counts(counts), AMINO_ACIDS, aa_order))
 
-covid_freqs = codon_frequencies(covid_seq)
-flu_freqs = codon_frequencies(flu_seq)
+covid_freqs, covid_aas = genome_frequencies("covid.fasta")
+flu_freqs, flu_aas = genome_frequencies("influenza.fna")
 
 # A) Top 10 codons COVID
 top10_covid = top_codons(covid_freqs)
@@ -114,9 +122,6 @@ if common_codons:
 
 
 # D) Top 3 amino acids for each genome
-covid_aas = aminoacid_frequencies(covid_seq)
-flu_aas = aminoacid_frequencies(flu_seq)
-
 top3_covid_aa = covid_aas.most_common(3)
 top3_flu_aa = flu_aas.most_common(3)
 
@@ -8,18 +8,13 @@
 #Note the samples must be aligned starting with the min of 10 positions in order to
 #avoid random matching
 
+import os
+import sys
 import random
 import matplotlib.pyplot as plt
 
-def read_fasta(path):
-    seq = []
-    with open(path, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith('>'):
-                continue
-            seq.append(line)
-    return "".join(seq).upper()
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from seqtools.cache import load_genome
 
 def get_random_samples(S, num_samples=2000, min_len=100, max_len=150, seed=42):
     random.seed(seed)
@@ -93,7 +88,7 @@ def print_main_problem_notes():
 
 if __name__ == "__main__":
     fasta_path = "lab5.fasta"
-    S = read_fasta(fasta_path)
+    S = load_genome(fasta_path)
     if not (1000 <= len(S) <= 3000):
         print("The seq. has not between 1000-3000 nucleotides.")
     samples = get_random_samples(S, num_samples=2000, min_len=100, max_len=150, seed=7)
@@ -9,18 +9,15 @@
 #D) Make a text file in which you explain the differences between the positions 
 # of the points.
 
+import os
+import sys
 import time
 import random
 import matplotlib.pyplot as plt
 
-def read_fasta(path):
-    seq = []
-    with open(path, 'r') as f:
-        for line in f:
-            if line.startswith('>'):
-                continue
-            seq.append(line.strip())
-    return "".join(seq).upper()
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from seqtools.cache import load_genome
+from seqtools.batch import map_genomes
 
 def get_random_samples(S, num_samples=2000, min_len=100, max_len=150, seed=42):
     random.seed(seed)
@@ -67,6 +64,19 @@ def cg_percentage(S):
     cg = sum(1 for c in S if c in ('C', 'G'))
     return cg / len(S) * 100
 
+def prepare_genome(path):
+    # loading, sampling and C+G% run in the worker processes
+    S = load_genome(path)
+    samples = get_random_samples(S, num_samples=2000, min_len=100, max_len=150, seed=7)
+    return samples, cg_percentage(S)
+
+def assemble_genome(samples):
+    # timed serially in the main process, so the assemblies do not compete
+    # for the CPU and their times stay comparable
+    start = time.time()
+    contig = greedy_assemble(list(samples), min_overlap=10)
+    return (time.time() - start) * 1000
+
 if __name__ == "__main__":
     genomes = {
         "SARS-CoV-2": "covid.fasta",
@@ -85,13 +95,10 @@ if __name__ == "__main__":
     cg_perc = []
     labels = []
 
-    for name, file in genomes.items():
-        S = read_fasta(file)
-        samples = get_random_samples(S, num_samples=2000, min_len=100, max_len=150, seed=7)
-        start = time.time()
-        contig = greedy_assemble(list(samples), min_overlap=10)
-        elapsed = (time.time() - start) * 1000
-        cg = cg_percentage(S)
+    # every worker has finished before the first assembly is timed
+    prepared = list(map_genomes(prepare_genome, list(genomes.values())))
+    for name, (samples, cg) in zip(genomes, prepared):
+        elapsed = assemble_genome(samples)
         times.append(elapsed)
         cg_perc.append(cg)
         labels.append(name)
@@ -1,14 +1,11 @@
+import os
+import sys
 import random
 import math
 import matplotlib.pyplot as plt
 
-def read_fasta(filename):
-    seq = ""
-    with open(filename, "r") as f:
-        for line in f:
-            if not line.startswith(">"):
-                seq += line.strip()
-    return seq.upper()
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from seqtools.faidx import FastaIndex
 
 def random_fragments(seq, n=10, min_len=100, max_len=3000):
     fragments = []
@@ -56,10 +53,11 @@ def plot_gel(fragments):
     plt.show()
 
 
-full_seq = read_fasta("ebola.fasta")
-print("Full sequence length:", len(full_seq), "bp")
+index = FastaIndex("ebola.fasta")
+name = index.names[0]
+print("Full sequence length:", index.length(name), "bp")
 
-seq = full_seq[:3000]
+seq = index.fetch(name, 0, 3000)
 print("Selected sequence length:", len(seq), "bp")
 
 fragments = random_fragments(seq)
@@ -10,16 +10,13 @@
 # reports which genome shows the most DNA (sum of fragment lengths in window) and most bands.
 
 import os
+import sys
 import math
 import matplotlib.pyplot as plt
 
-def read_fasta(filename):
-    seq = []
-    with open(filename, "r") as f:
-        for line in f:
-            if not line.startswith(">"):
-                seq.append(line.strip())
-    return "".join(seq).upper()
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from seqtools.cache import load_genome
+from seqtools.batch import map_genomes
 
 def ecoRI_digest(seq):
     site = "GAATTC"
@@ -83,42 +80,45 @@ def plot_gel_combined(name_to_sizes, markers=(3000,1000,500)):
     plt.show()
 
 
-files = [
-    ("ebola.fasta", "Ebola"),
-    ("covid.fasta", "COVID-19"),
-    ("dengue.fasta", "Dengue"),
-    ("influentzaA.fasta", "Influenza A"),
-    ("papilloma.fasta", "Papillomavirus"),
-    ("rabies.fasta", "Rabies"),
-    ("westNile.fasta", "West Nile virus"),
-    ("zika.fasta", "Zika"),
-    ("MERSCoV.fasta", "MERS-CoV"),
-    ("norWalk.fasta", "Norwalk"),
-]
-
-existing = [(p, n) for (p, n) in files if os.path.exists(p)]
-if len(existing) < 1:
-    raise FileNotFoundError("Fișierele .fasta nu au fost găsite în folderul curent.")
-
-name_to_sizes = []
-report = []
-
-for path, nice_name in existing:
-    seq = read_fasta(path)
+def gel_sizes(path):
+    seq = load_genome(path)
     frags = ecoRI_digest(seq)
     frags_sel = filter_window(frags, 100, 3000)
-    sizes = [len(f) for f in frags_sel]
-    name_to_sizes.append((nice_name, sizes))
-    total_bp = sum(sizes)
-    report.append((nice_name, total_bp, len(sizes), max(sizes) if sizes else 0))
+    return [len(f) for f in frags_sel]
+
+if __name__ == "__main__":
+    files = [
+        ("ebola.fasta", "Ebola"),
+        ("covid.fasta", "COVID-19"),
+        ("dengue.fasta", "Dengue"),
+        ("influentzaA.fasta", "Influenza A"),
+        ("papilloma.fasta", "Papillomavirus"),
+        ("rabies.fasta", "Rabies"),
+        ("westNile.fasta", "West Nile virus"),
+        ("zika.fasta", "Zika"),
+        ("MERSCoV.fasta", "MERS-CoV"),
+        ("norWalk.fasta", "Norwalk"),
+    ]
+
+    existing = [(p, n) for (p, n) in files if os.path.exists(p)]
+    if len(existing) < 1:
+        raise FileNotFoundError("Fișierele .fasta nu au fost găsite în folderul curent.")
+
+    name_to_sizes = []
+    report = []
+
+    for (path, nice_name), sizes in zip(existing, map_genomes(gel_sizes, [p for p, _ in existing])):
+        name_to_sizes.append((nice_name, sizes))
+        total_bp = sum(sizes)
+        report.append((nice_name, total_bp, len(sizes), max(sizes) if sizes else 0))
 
-name_to_sizes_dict = dict(name_to_sizes)
-plot_gel_combined(name_to_sizes_dict)
+    name_to_sizes_dict = dict(name_to_sizes)
+    plot_gel_combined(name_to_sizes_dict)
 
-report.sort(key=lambda x: (-x[1], -x[2], -x[3]))
+    report.sort(key=lambda x: (-x[1], -x[2], -x[3]))
 
-for name, total_bp, band_count, max_frag in report:
-    print(f"{name}: total_bp={total_bp}, bands={band_count}, max_frag={max_frag}")
+    for name, total_bp, band_count, max_frag in report:
+        print(f"{name}: total_bp={total_bp}, bands={band_count}, max_frag={max_frag}")
 
-if report:
-    print("\nMost DNA on gel:", report[0][0])
+    if report:
+        print("\nMost DNA on gel:", report[0][0])
@@ -1,19 +1,16 @@
-def read_fasta(filename):
-    seq = ""
-    with open(filename, "r") as f:
-        for line in f:
-            if not line.startswith(">"):
-                seq += line.strip()
-    return seq.upper()
+import os
+import sys
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from seqtools.faidx import FastaIndex
+from seqtools.kmers import kmer_dicts
 
-def find_repeats(seq, min_len, max_len, min_reps):
+
+def find_repeats(seq, min_len, max_len, min_reps, canonical=False):
+    # canonical=True merges each fragment with its reverse complement
     repeats = {}
-    for L in range(min_len, max_len + 1):
-        seen = {}
-        for i in range(len(seq) - L + 1):
-            frag = seq[i:i + L]
-            seen[frag] = seen.get(frag, 0) + 1
+    spectrum = kmer_dicts(seq, range(min_len, max_len + 1), first_seen=True, canonical=canonical)
+    for L, seen in spectrum.items():
         for frag, count in seen.items():
             if count >= min_reps:
                 repeats[(frag, L)] = count
@@ -30,7 +27,8 @@ def print_repeats(reps):
             line = f"{frag} (len={L})  ->  {cnt} times\n"
             f.write(line)
 
-seq = read_fasta("covid.fasta")[:3000]
+index = FastaIndex("covid.fasta")
+seq = index.fetch(index.names[0], 0, 3000)
 
 if not (1000 <= len(seq) <= 3000):
     print("WARNING: Seq. length is not within 1000–3000 bp.")
@@ -3,22 +3,17 @@
 
 import matplotlib.pyplot as plt
 import os
+import sys
 
-def read_fasta(filename):
-    seq = ""
-    with open(filename, "r") as f:
-        for line in f:
-            if not line.startswith(">"):
-                seq += line.strip()
-    return seq.upper()
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from seqtools.faidx import FastaIndex
+from seqtools.kmers import kmer_dicts
 
-def find_repeats(seq, min_len=3, max_len=6, min_reps=2):
+def find_repeats(seq, min_len=3, max_len=6, min_reps=2, canonical=False):
+    # canonical=True merges each fragment with its reverse complement
     repeats = {}
-    for L in range(min_len, max_len + 1):
-        seen = {}
-        for i in range(len(seq) - L + 1):
-            frag = seq[i:i + L]
-            seen[frag] = seen.get(frag, 0) + 1
+    spectrum = kmer_dicts(seq, range(min_len, max_len + 1), first_seen=True, canonical=canonical)
+    for L, seen in spectrum.items():
         for frag, c in seen.items():
             if c >= min_reps:
                 repeats[(frag, L)] = c
@@ -38,8 +33,8 @@ for f in files:
         print("Missing:", f)
         continue
 
-    seq = read_fasta(f)
-    seq = seq[:3000]
+    index = FastaIndex(f)
+    seq = index.fetch(index.names[0], 0, 3000)
 
     reps = find_repeats(seq, 3, 6, 2)
 
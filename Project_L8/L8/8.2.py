@@ -11,66 +11,77 @@
 #NOTE2! The min size of the inverted digits must be of 4bases, and the max.
 #of the inverted digits must be 6bases 
 
+import os
+import sys
+import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from seqtools.packed import open_genome, kmer_codes, kmer_dtype, revcomp_codes, clean_windows
+
 MIN_IR = 4
 MAX_IR = 6
 MIN_BODY = 20
 MAX_BODY = 200
 DR_LEN = 3
+# longest element (DR + IR + body + IR + DR) and start positions per chunk
+SPAN = 2 * DR_LEN + 2 * MAX_IR + MAX_BODY
+CHUNK = 1 << 18
 
 def revcomp(seq):
     comp = str.maketrans("ACGT", "TGCA")
     return seq.translate(comp)[::-1]
 
-def read_fasta_sequence(path):
-    seq = []
-    with open(path, "r") as f:
-        for line in f:
-            if not line.startswith(">"):
-                seq.append(line.strip().upper())
-    return "".join(seq)
-
-def find_transposons_in_genome(seq):
-    n = len(seq)
+def find_transposons_in_chunk(codes, mask, owned, stop):
+    # elements starting in [0, owned) and ending before stop, in chunk
+    # positions; codes/mask cover the owned starts plus the SPAN - 1 bases
+    # after them (or up to the end of the genome)
+    dr = kmer_codes(codes, DR_LEN, kmer_dtype(DR_LEN))
+    dr_ok = clean_windows(mask, DR_LEN)
     results = []
 
     for L in range(MIN_IR, MAX_IR + 1):
-        pos = {}
-        for i in range(n - L + 1):
-            k = seq[i:i+L]
-            pos.setdefault(k, []).append(i)
-
-        for left, left_list in pos.items():
-            rc = revcomp(left)
-            if rc not in pos:
+        # too short for a left DR + IR (e.g. the tail of the last chunk)
+        if len(codes) < L + 2 * DR_LEN:
+            continue
+        kmers = kmer_codes(codes, L, kmer_dtype(L))
+        ok = clean_windows(mask, L)
+        rc = revcomp_codes(kmers, L)
+
+        # left IR at i = s + DR_LEN, right IR at j = i + L + body; for a
+        # fixed body every test is a comparison of two shifted slices, so no
+        # position arrays are built
+        left_ok = ok[DR_LEN:] & dr_ok[:len(ok) - DR_LEN]
+
+        for body in range(MIN_BODY + 1, MAX_BODY + 1):
+            d = L + body
+            count = min(owned, stop - (2 * DR_LEN + 2 * L + body))
+            if count <= 0:
                 continue
-            right_list = pos[rc]
-
-            for i in left_list:
-                min_j = i + L + MIN_BODY
-                max_j = i + L + MAX_BODY
-                if min_j >= n:
-                    continue
-
-                for j in right_list:
-                    if j <= min_j:
-                        continue
-                    if j > max_j:
-                        break
-                    if j >= n - L - DR_LEN:
-                        break
-                    if i - DR_LEN < 0:
-                        continue
-
-                    DR_left = seq[i-DR_LEN:i]
-                    DR_right = seq[j+L:j+L+DR_LEN]
-
-                    if DR_left == DR_right:
-                        start = i - DR_LEN
-                        end = j + L + DR_LEN
-                        results.append((start, end, L))
+            i = slice(DR_LEN, DR_LEN + count)
+            j = slice(DR_LEN + d, DR_LEN + d + count)
+            right_dr = slice(DR_LEN + d + L, DR_LEN + d + L + count)
+            hit = (left_ok[:count] & (kmers[j] == rc[i]) & ok[j] & dr_ok[right_dr]
+                   & (dr[:count] == dr[right_dr]))
+            for s in np.flatnonzero(hit).tolist():
+                results.append((s, s + 2 * DR_LEN + d + L, L))
+    return results
+
+def find_transposons_in_genome(genome, chunk=CHUNK):
+    # scanned chunk by chunk from the packed file: each chunk owns `chunk`
+    # start positions and reads the SPAN - 1 bases after them, so every
+    # element is found exactly once and only one chunk is unpacked at a time
+    n = len(genome)
+    results = []
+
+    for start in range(0, n, chunk):
+        end = min(start + chunk + SPAN - 1, n)
+        # an element must end before the last base of the genome
+        stop = end - start if end == n else end - start + 1
+        found = find_transposons_in_chunk(genome.codes(start, end), genome.mask(start, end),
+                                          min(chunk, n - start), stop)
+        results.extend((s + start, e + start, L) for s, e, L in found)
 
     results.sort()
     final = []
@@ -93,8 +104,8 @@ def find_overlaps(tes):
                 pairs.append((i, j))
     return pairs
 
-def nucleotide_distribution(seq, title):
-    counts = {b: seq.count(b) for b in "ACGT"}
+def nucleotide_distribution(genome, title):
+    counts = genome.base_counts()
     plt.figure(figsize=(6,4))
     plt.bar(counts.keys(), counts.values())
     plt.title("Nucleotide Distribution " + title)
@@ -148,11 +159,11 @@ def plot_transposon_structure(DR, IR_left, body, IR_right, title):
     plt.show()
 
 def summarize_genome(path):
-    seq = read_fasta_sequence(path)
+    genome = open_genome(path)
     print("\n=== Genome:", path, "===")
-    print("Length:", len(seq))
+    print("Length:", len(genome))
 
-    tes = find_transposons_in_genome(seq)
+    tes = find_transposons_in_genome(genome)
     print("Detected transposons:", len(tes))
 
     for i, (s, e, L) in enumerate(tes):
@@ -161,15 +172,15 @@ def summarize_genome(path):
     overlaps = find_overlaps(tes)
     print("Overlaps:", overlaps)
 
-    nucleotide_distribution(seq, "for " + path)
+    nucleotide_distribution(genome, "for " + path)
     transposon_lengths(tes, "for " + path)
 
     if tes:
         s, e, L = tes[0]
-        DR = seq[s:s+DR_LEN]
-        IR_left = seq[s+DR_LEN:s+DR_LEN+L]
-        IR_right = seq[e-DR_LEN-L:e-DR_LEN]
-        body = seq[s+DR_LEN+L:e-DR_LEN-L]
+        DR = genome[s:s+DR_LEN]
+        IR_left = genome[s+DR_LEN:s+DR_LEN+L]
+        IR_right = genome[e-DR_LEN-L:e-DR_LEN]
+        body = genome[s+DR_LEN+L:e-DR_LEN-L]
         plot_transposon_structure(DR, IR_left, body, IR_right, "from " + path)
 
 genomes = [
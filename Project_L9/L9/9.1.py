@@ -1,7 +1,11 @@
 import os
+import sys
 import math
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from seqtools.cache import load_genome
+
 ENZYMES = {
     "EcoRI":  ("GAATTC", 1),
     "BamHI":  ("GGATCC", 1),
@@ -10,16 +14,6 @@ ENZYMES = {
     "HaeIII": ("GGCC",   2),
 }
 
-def read_fasta(path):
-    s = []
-    with open(path) as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith(">"):
-                continue
-            s.append(line.upper())
-    return "".join(s)
-
 def find_sites(seq, pat, cut):
     p = []
     i = 0
@@ -65,13 +59,13 @@ def simulate_gel(data):
     plt.show()
 
 def main():
-    fasta_files = [f for f in os.listdir() if f.lower().endswith(".fasta")]
+    fasta_files = [f for f in os.listdir() if f.lower().endswith((".fasta", ".fasta.gz"))]
     if not fasta_files:
         print("No FASTA file found.")
         return
 
     fasta = fasta_files[0]
-    seq = read_fasta(fasta)
+    seq = load_genome(fasta)
     L = len(seq)
 
     print("Sequence length:", L, "bp\n")
@@ -7,9 +7,14 @@
 # in one general electrophoresys genome.
 
 import os
+import sys
 import math
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from seqtools.cache import load_genome
+from seqtools.batch import map_genomes
+
 ENZYMES = {
     "EcoRI":  ("GAATTC", 1),
     "BamHI":  ("GGATCC", 1),
@@ -18,16 +23,6 @@ ENZYMES = {
     "HaeIII": ("GGCC", 2),
 }
 
-def read_fasta(path):
-    s = []
-    with open(path) as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith(">"):
-                continue
-            s.append(line.upper())
-    return "".join(s)
-
 def find_sites(seq, pat, cut):
     p = []
     i = 0
@@ -57,6 +52,10 @@ def digest_sequence(seq):
         res[name] = fr
     return res
 
+def load_and_digest(path):
+    seq = load_genome(path)
+    return len(seq), digest_sequence(seq)
+
 def simulate_gel(lanes, title, save_path=None):
     allf = [v for x in lanes.values() for v in x]
     if not allf:
@@ -89,7 +88,7 @@ def simulate_gel(lanes, title, save_path=None):
     plt.close(fig)
 
 def main():
-    fasta_files = [f for f in os.listdir() if f.lower().endswith(".fasta")]
+    fasta_files = [f for f in os.listdir() if f.lower().endswith((".fasta", ".fasta.gz"))]
     fasta_files = [f for f in fasta_files if "covid" not in f.lower() and "ebola" not in f.lower()]
     fasta_files.sort()
     if len(fasta_files) == 0:
@@ -104,10 +103,8 @@ def main():
 
     genome_digests = {}
 
-    for fasta in fasta_files:
-        seq = read_fasta(fasta)
-        print("\n", fasta, "length:", len(seq), "bp")
-        digest = digest_sequence(seq)
+    for fasta, (length, digest) in zip(fasta_files, map_genomes(load_and_digest, fasta_files)):
+        print("\n", fasta, "length:", length, "bp")
         genome_digests[fasta] = digest
         for enz, fr in digest.items():
             print(enz, "fragments:", fr)
@@ -148,4 +145,5 @@ def main():
                  title="Combined Gel – Unique Fragments Across All Genomes",
                  save_path="combined_unique_fragments_gel.png")
 
-main()
+if __name__ == "__main__":
+    main()
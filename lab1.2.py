@@ -1,11 +1,7 @@
+from seqtools.composition import count_symbols, relative_frequencies
+
 def relative_frequency(S):
-    freq = {}
-    n = len(S)
-    for char in S:
-        freq[char] = freq.get(char, 0) + 1
-    for char in freq:
-        freq[char]/=n
-    return freq
+    return relative_frequencies(count_symbols(S))
 
 
 S = input('Input a sequence of 20 letters: ')
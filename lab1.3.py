@@ -1,94 +1,95 @@
 #https://ftp.ncbi.nlm.nih.gov/genomes/HUMAN_MICROBIOM/Bacteria/Bacteroides_4_3_47FAA_uid32443/NZ_ACDR00000000.scaffold.faa.tgz
 
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import messagebox
 import tarfile
 import os
+from collections import Counter
+from seqtools.fasta import iter_fasta_bytes
+from seqtools import composition
+from seqtools.tkworker import JobPanel
+
+TABLE_PATH = "composition_table.tsv"
 
 def detect_alphabet(S):
-    return set(S)
+    return composition.alphabet(composition.count_symbols(S))
 
 def relative_frequencies(S):
-    freq = {}
-    total = len(S)
-    for char in S:
-        freq[char] = freq.get(char, 0) + 1
-    for char in freq:
-        freq[char] /= total
-    return freq
-
-def read_fasta(file_path):
-    #Read a FASTA file and return a list of (header, sequence)
-    sequences = []
-    with open(file_path, "r") as f:
-        header = None
-        seq_lines = []
-        for line in f:
-            line = line.strip()
-            if line.startswith(">"):  # new sequence
-                if header and seq_lines:
-                    sequences.append((header, "".join(seq_lines)))
-                header = line
-                seq_lines = []
-            else:
-                seq_lines.append(line)
-        if header and seq_lines:  # last sequence
-            sequences.append((header, "".join(seq_lines)))
-    return sequences
+    return composition.relative_frequencies(composition.count_symbols(S))
+
+class ProgressReader:
+    # wraps the raw .tgz file so the progress bar follows the bytes consumed
+    def __init__(self, f, total, callback):
+        self.f = f
+        self.total = total
+        self.done = 0
+        self.callback = callback
+
+    def read(self, size=-1):
+        data = self.f.read(size)
+        self.done += len(data)
+        self.callback(self.done / self.total * 100 if self.total else 100)
+        return data
+
+def iter_tgz_proteins(tgz_path, callback):
+    # yields (member name, header, sequence) for every record of every .faa member
+    with open(tgz_path, "rb") as raw:
+        reader = ProgressReader(raw, os.path.getsize(tgz_path), callback)
+        with tarfile.open(fileobj=reader, mode="r|gz") as tar:
+            for member in tar:
+                if not member.isfile() or not member.name.endswith(".faa"):
+                    continue
+                for header, seq in iter_fasta_bytes(tar.extractfile(member)):
+                    if seq:
+                        yield member.name, header, seq
+
+def format_freqs(freqs):
+    return "".join(f"  {k}: {v:.3f}\n" for k, v in sorted(freqs.items()))
+
+TGZ_PATH = r"C:\Users\rdoro\OneDrive\Desktop\Anul_IV\Bioinformatics\lab1.3\NZ_ACDR00000000.scaffold.faa.tgz"
+
+def analyze_archive(job, tgz_path):
+    examples = []
+    member_records = Counter()
+    member_residues = Counter()
+
+    def records():
+        for member, header, seq in iter_tgz_proteins(tgz_path, job.progress):
+            job.check()
+            member_records[member] += 1
+            member_residues[member] += len(seq)
+            if len(examples) < 3:
+                examples.append((header, seq))
+            yield f"{member}:{header}", seq
+
+    # per-record table is written while streaming; only the totals stay in memory
+    with open(TABLE_PATH, "w") as table:
+        global_counts, total_records = composition.composition_report(records(), table)
+
+    if not total_records:
+        raise ValueError("No sequences found in the .faa files of the archive!")
+
+    result = f"Found {total_records} sequences in {len(member_records)} .faa file(s).\n"
+    for member in member_records:
+        result += f"  {member}: {member_records[member]} sequences, {member_residues[member]} residues\n"
+    result += f"Per-sequence composition table: {os.path.abspath(TABLE_PATH)}\n\n"
+
+    for i, (header, seq) in enumerate(examples, start=1):
+        result += f"Sequence {i}:\n>{header}\nLength: {len(seq)}\n"
+        result += f"Alphabet: {detect_alphabet(seq)}\nRelative frequencies:\n"
+        result += format_freqs(relative_frequencies(seq)) + "\n"
+
+    result += "\n=== Global Summary for All Sequences ===\n"
+    result += f"Total alphabet: {composition.alphabet(global_counts)}\nGlobal relative frequencies:\n"
+    result += format_freqs(composition.relative_frequencies(global_counts))
+
+    return result
+
+def on_done(result):
+    messagebox.showinfo("FASTA Analysis Result", result)
 
 def analyze_fasta():
-    try:
-        tgz_path = r"C:\Users\rdoro\OneDrive\Desktop\Anul_IV\Bioinformatics\lab1.3\NZ_ACDR00000000.scaffold.faa.tgz"
-        extract_dir = os.path.dirname(tgz_path)
-        
-        progress_bar["value"] = 10
-        root.update_idletasks()
-        
-        with tarfile.open(tgz_path, "r:gz") as tar:
-            tar.extractall(path=extract_dir)
-
-        progress_bar["value"] = 40
-        root.update_idletasks()
-
-        faa_files = [f for f in os.listdir(extract_dir) if f.endswith(".faa")]
-        if not faa_files:
-            messagebox.showerror("Error", "No .faa files found after extraction!")
-            return
-        faa_path = os.path.join(extract_dir, faa_files[0])
-
-        sequences = read_fasta(faa_path)
-        if not sequences:
-            messagebox.showerror("Error", "No sequences found in the file!")
-            return
-
-        progress_bar["value"] = 70
-        root.update_idletasks()
-
-        result = f"Found {len(sequences)} sequences in the file.\n\n"
-        for i, (header, seq) in enumerate(sequences[:3], start=1):  
-            alphabet = detect_alphabet(seq)
-            freqs = relative_frequencies(seq)
-            result += f"Sequence {i}:\n{header}\nLength: {len(seq)}\n"
-            result += f"Alphabet: {alphabet}\nRelative frequencies:\n"
-            for k, v in sorted(freqs.items()):
-                result += f"  {k}: {v:.3f}\n"
-            result += "\n"
-
-        global_seq = "".join(seq for _, seq in sequences)
-        alphabet = detect_alphabet(global_seq)
-        freqs = relative_frequencies(global_seq)
-        result += "\n=== Global Summary for All Sequences ===\n"
-        result += f"Total alphabet: {alphabet}\nGlobal relative frequencies:\n"
-        for k, v in sorted(freqs.items()):
-            result += f"  {k}: {v:.3f}\n"
-
-        progress_bar["value"] = 100
-        root.update_idletasks()
-
-        messagebox.showinfo("FASTA Analysis Result", result)
-
-    except Exception as e:
-        messagebox.showerror("Error", str(e))
+    panel.run(analyze_archive, (TGZ_PATH,), on_done)
 
 root = tk.Tk()
 root.title("FASTA Analyzer (.tgz direct)")
@@ -99,7 +100,6 @@ frame.pack(pady=20, padx=20)
 button = tk.Button(frame, text="Analyze FASTA File", command=analyze_fasta, font=("Arial", 14))
 button.pack(pady=10)
 
-progress_bar = ttk.Progressbar(frame, orient="horizontal", length=300, mode="determinate")
-progress_bar.pack(pady=10)
+panel = JobPanel(frame, button, status=False, error_prefix="")
 
 root.mainloop()
@@ -0,0 +1,32 @@
+# Batch driver for the multi-genome labs.
+# Each item (usually a FASTA path) is loaded and analysed by `func` in a
+# worker process. At most `max_pending` jobs are in flight at a time, and
+# results are yielded in the same order as the input items, so plots and
+# reports come out identical to a serial run.
+#
+# `func` must be a top-level function and the calling script must keep its
+# batch code under `if __name__ == "__main__":` (Windows spawns new
+# interpreters that re-import the script).
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+
+def map_genomes(func, items, workers=None, max_pending=None):
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+
+    if workers == 1:
+        for item in items:
+            yield func(item)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(func, item))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
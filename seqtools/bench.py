@@ -0,0 +1,225 @@
+# Benchmarks for the lab kernels on synthetic genomes.
+# Each kernel is taken straight from its lab script: the script is parsed and
+# only the function plus the top-level definitions and assignments it needs
+# are executed, so GUIs, plots and file loading at the top of the labs never
+# run. Every kernel is timed with perf_counter on random ACGT genomes of
+# 10 kb, 1 Mb and 10 Mb: best of --repeat rounds, where each round calls the
+# kernel as many times as it takes to run for at least --min-time seconds,
+# so sub-millisecond timings are averaged over many calls. It is then run
+# once more under tracemalloc for its peak memory. Sizes a slow kernel would
+# need more than --budget seconds for (extrapolated from the previous size)
+# are skipped, except sizes the baseline has a timing for.
+#
+# Results go to JSON. With --baseline, timings are compared against an
+# earlier result file and the run exits with status 1 when any kernel got
+# slower than the baseline by more than --tolerance (and by more than
+# NOISE_FLOOR seconds), or a size the baseline measured was not measured.
+#
+#   python -m seqtools.bench --output bench.json
+#   python -m seqtools.bench --baseline bench.json --tolerance 0.25
+
+import argparse
+import ast
+import json
+import math
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SIZES = {"10kb": 10_000, "1Mb": 1_000_000, "10Mb": 10_000_000}
+SEED = 12345
+MIN_TIME = 0.2
+NOISE_FLOOR = 0.001
+
+# name: (lab script, function, call)
+KERNELS = {
+    "percentage": ("Proiect_L2/L2/lab2.2.py", "percentage", lambda f, seq: f(seq, 2)),
+    "relative_frequencies": ("Proiect_L2/L2/ex3/lab2.3.py", "relative_frequencies",
+                             lambda f, seq: f(seq, 30)),
+    "calculate_tm_signals": ("Project_L3/L3/lab3.2.py", "calculate_tm_signals",
+                             lambda f, seq: f(seq, 9, 0.001)),
+    "codon_frequencies": ("Project_L4/L4/lab4.2.py", "codon_frequencies", lambda f, seq: f(seq)),
+    "compute_pattern": ("Project_L10/L10/10.1.py", "compute_pattern", lambda f, seq: f(seq, 30)),
+}
+
+
+def synthetic_genome(size, seed=SEED):
+    rng = np.random.default_rng(seed)
+    return np.frombuffer(b"ACGT", dtype=np.uint8)[rng.integers(0, 4, size)].tobytes().decode("ascii")
+
+
+def bound_names(node):
+    if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+        return {node.name}
+    if isinstance(node, (ast.Import, ast.ImportFrom)):
+        return {(a.asname or a.name).split(".")[0] for a in node.names}
+    targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+    return {n.id for t in targets for n in ast.walk(t) if isinstance(n, ast.Name)}
+
+
+def free_names(node):
+    # names a top-level statement reads from the module namespace
+    loaded = {n.id for n in ast.walk(node) if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Load)}
+    if not isinstance(node, ast.FunctionDef):
+        return loaded
+    local = {a.arg for a in ast.walk(node.args) if isinstance(a, ast.arg)}
+    local |= {n.id for n in ast.walk(node) if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Store)}
+    for n in ast.walk(node):
+        if isinstance(n, (ast.Global, ast.Nonlocal)):
+            local -= set(n.names)
+    # decorators and defaults are evaluated at module level
+    outer = [*node.decorator_list, *node.args.defaults, *node.args.kw_defaults]
+    return (loaded - local) | {n.id for e in outer if e for n in ast.walk(e) if isinstance(n, ast.Name)}
+
+
+def load_function(script, name):
+    # `name` from a lab script, with only what it depends on executed
+    path = os.path.join(ROOT, script)
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+
+    kinds = (ast.Import, ast.ImportFrom, ast.FunctionDef, ast.ClassDef, ast.Assign, ast.AnnAssign)
+    nodes = [n for n in tree.body if isinstance(n, kinds)]
+    needed = {name}
+    keep = set()
+    changed = True
+    while changed:
+        changed = False
+        for i, node in enumerate(nodes):
+            if i not in keep and bound_names(node) & needed:
+                keep.add(i)
+                needed |= free_names(node)
+                changed = True
+
+    module = ast.Module(body=[n for i, n in enumerate(nodes) if i in keep], type_ignores=[])
+    namespace = {"__file__": path, "__name__": "bench_" + name}
+    exec(compile(module, path, "exec"), namespace)
+    return namespace[name]
+
+
+def measure(call, func, seq, repeat, min_time=MIN_TIME):
+    # the first (warm-up) call sizes the rounds; best per-call time of the rounds
+    start = time.perf_counter()
+    call(func, seq)
+    first = time.perf_counter() - start
+    loops = max(1, math.ceil(min_time / first)) if first > 0 else 1000
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            call(func, seq)
+        best = min(best, (time.perf_counter() - start) / loops)
+    tracemalloc.start()
+    try:
+        call(func, seq)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"seconds": best, "peak_bytes": peak, "loops": loops,
+            "bases_per_second": len(seq) / best if best else None}
+
+
+def measured(results, kname, sname):
+    return "seconds" in results.get(kname, {}).get(sname, {})
+
+
+def run(kernels, sizes, repeat=3, budget=60.0, min_time=MIN_TIME, baseline=None, log=print):
+    # sizes measured in `baseline` are never skipped
+    results = {}
+    genomes = {}
+    for kname in kernels:
+        script, fname, call = KERNELS[kname]
+        func = load_function(script, fname)
+        results[kname] = {}
+        rate = None
+        for sname in sizes:
+            n = SIZES[sname]
+            required = baseline is not None and measured(baseline, kname, sname)
+            if rate and n / rate * (repeat + 2) > budget and not required:
+                results[kname][sname] = {"skipped": f"estimated over the {budget:g} s budget"}
+                log(f"{kname:22} {sname:>5}  skipped")
+                continue
+            if sname not in genomes:
+                genomes[sname] = synthetic_genome(n)
+            r = results[kname][sname] = measure(call, func, genomes[sname], repeat, min_time)
+            rate = r["bases_per_second"]
+            log(f"{kname:22} {sname:>5}  {r['seconds']:10.4f} s  {r['peak_bytes'] / 2**20:9.1f} MB"
+                f"  {rate:14,.0f} bases/s")
+    return results
+
+
+def compare(results, baseline, tolerance, floor=NOISE_FLOOR):
+    # [(kernel, size, baseline seconds, seconds or None)] of every regression;
+    # None marks a size the baseline measured that was skipped or not run
+    slower = []
+    for kname, by_size in results.items():
+        for sname, base in baseline.get(kname, {}).items():
+            if "seconds" not in base:
+                continue
+            before = base["seconds"]
+            now = by_size.get(sname, {}).get("seconds")
+            if now is None or (now > before * (1 + tolerance) and now - before > floor):
+                slower.append((kname, sname, before, now))
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the lab kernels on synthetic genomes.")
+    parser.add_argument("--kernels", default=",".join(KERNELS), help="comma-separated kernel names")
+    parser.add_argument("--sizes", default=",".join(SIZES), help="comma-separated genome sizes")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--min-time", type=float, default=MIN_TIME,
+                        help="run each timing round for at least this many seconds")
+    parser.add_argument("--budget", type=float, default=60.0,
+                        help="skip sizes estimated to take longer than this many seconds")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown against the baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    kernels = args.kernels.split(",")
+    sizes = args.sizes.split(",")
+    for name in kernels:
+        if name not in KERNELS:
+            parser.error(f"unknown kernel {name!r}; expected one of {', '.join(KERNELS)}")
+    for name in sizes:
+        if name not in SIZES:
+            parser.error(f"unknown size {name!r}; expected one of {', '.join(SIZES)}")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        # only the kernels and sizes of this run are compared
+        baseline = {k: {s: r for s, r in by_size.items() if s in sizes}
+                    for k, by_size in baseline.items() if k in kernels}
+
+    results = run(kernels, sizes, args.repeat, args.budget, args.min_time, baseline)
+    report = {
+        "meta": {"python": platform.python_version(), "numpy": np.__version__,
+                 "machine": platform.machine(), "cpus": os.cpu_count(), "seed": SEED,
+                 "repeat": args.repeat, "min_time": args.min_time},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if baseline is not None:
+        slower = compare(results, baseline, args.tolerance)
+        for kname, sname, before, now in slower:
+            after = "not measured" if now is None else f"{now:.4f} s"
+            print(f"REGRESSION {kname} {sname}: {before:.4f} s -> {after}")
+        if slower:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
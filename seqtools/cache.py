@@ -0,0 +1,161 @@
+# On-disk cache of parsed genomes.
+# The cleaned, uppercased sequence of a FASTA file (what read_fasta returns)
+# is stored as a raw byte blob named after the content hash of the file.
+# A small key file per (path, size, mtime) points at that hash, so unchanged
+# files are found without re-hashing them, and a touched or copied file with
+# the same content reuses the existing blob. Blob mtimes record the last use;
+# when the cache grows past its size cap the least recently used blobs are
+# evicted together with the key files pointing at them (keys count towards
+# the cap as well). No shared manifest is written, so parallel workers can
+# use the same cache directory.
+#
+# SEQTOOLS_CACHE_DIR and SEQTOOLS_CACHE_MB override the default location
+# (~/.cache/seqtools) and size cap (1024 MB).
+
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+from seqtools.fasta import read_fasta
+from seqtools.packed import ENCODE
+
+DEFAULT_DIR = os.path.join(os.path.expanduser("~"), ".cache", "seqtools")
+DEFAULT_MB = 1024
+HASH_CHUNK = 1 << 20
+
+
+def content_hash(path):
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def remove_quietly(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def write_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class GenomeCache:
+    def __init__(self, cache_dir=None, max_bytes=None):
+        self.cache_dir = cache_dir or os.environ.get("SEQTOOLS_CACHE_DIR", DEFAULT_DIR)
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get("SEQTOOLS_CACHE_MB", DEFAULT_MB)) * (1 << 20))
+        self.max_bytes = max_bytes
+        self.key_dir = os.path.join(self.cache_dir, "keys")
+        self.blob_dir = os.path.join(self.cache_dir, "blobs")
+        os.makedirs(self.key_dir, exist_ok=True)
+        os.makedirs(self.blob_dir, exist_ok=True)
+
+    def _key_path(self, path):
+        st = os.stat(path)
+        key = f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}"
+        return os.path.join(self.key_dir, hashlib.sha1(key.encode()).hexdigest())
+
+    def _blob_path(self, digest):
+        return os.path.join(self.blob_dir, digest + ".seq")
+
+    def _lookup(self, key_path):
+        try:
+            with open(key_path) as f:
+                blob = self._blob_path(f.read().strip())
+            os.utime(blob)
+            return blob
+        except FileNotFoundError:
+            return None
+
+    def blob(self, path):
+        # path of the cached sequence blob, parsing the FASTA on a miss
+        key_path = self._key_path(path)
+        blob = self._lookup(key_path)
+        if blob:
+            return blob
+
+        digest = content_hash(path)
+        blob = self._blob_path(digest)
+        if os.path.exists(blob):
+            os.utime(blob)
+        else:
+            write_atomic(blob, read_fasta(path).encode("ascii"))
+        write_atomic(key_path, digest.encode())
+        self.evict(keep=blob)
+        return blob
+
+    def read(self, path):
+        with open(self.blob(path), "rb") as f:
+            return f.read().decode("ascii")
+
+    def codes(self, path):
+        # 2-bit codes (A=0, C=1, G=2, T=3, anything else 4) as a uint8 array
+        return ENCODE[np.fromfile(self.blob(path), dtype=np.uint8)]
+
+    def _key_files(self):
+        # {digest: [(key path, size)]}
+        keys = {}
+        for name in os.listdir(self.key_dir):
+            p = os.path.join(self.key_dir, name)
+            try:
+                with open(p) as f:
+                    digest = f.read().strip()
+                size = os.stat(p).st_size
+            except FileNotFoundError:
+                continue
+            keys.setdefault(digest, []).append((p, size))
+        return keys
+
+    def evict(self, keep=None):
+        # key files count towards the cap with the blob they point at and are
+        # removed along with it
+        keys = self._key_files()
+        blobs = []
+        for name in os.listdir(self.blob_dir):
+            p = os.path.join(self.blob_dir, name)
+            try:
+                st = os.stat(p)
+            except FileNotFoundError:
+                continue
+            own = keys.pop(os.path.splitext(name)[0], [])
+            blobs.append((st.st_mtime, st.st_size + sum(size for _, size in own), p, own))
+        # whatever is left points at a blob that no longer exists
+        for stale in keys.values():
+            for key_path, _ in stale:
+                remove_quietly(key_path)
+
+        total = sum(size for _, size, _, _ in blobs)
+        for _, size, p, own in sorted(blobs, key=lambda b: b[:3]):
+            if total <= self.max_bytes:
+                break
+            if p == keep:
+                continue
+            remove_quietly(p)
+            for key_path, _ in own:
+                remove_quietly(key_path)
+            total -= size
+
+    def clear(self):
+        for d in (self.key_dir, self.blob_dir):
+            for name in os.listdir(d):
+                os.remove(os.path.join(d, name))
+
+
+_default = None
+
+
+def load_genome(path):
+    # drop-in for read_fasta that goes through the default cache
+    global _default
+    if _default is None:
+        _default = GenomeCache()
+    return _default.read(path)
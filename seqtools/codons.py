@@ -0,0 +1,54 @@
+# Codon counting in all six reading frames.
+# The 2-bit codes of a strand are cut into codons with a reshape, each codon
+# becomes an index 0..63 (16 * first + 4 * second + third base), and one
+# np.bincount per frame counts them; codons containing N or another non-ACGT
+# symbol are dropped. Amino-acid counts are the codon counts summed through
+# the 64-entry genetic code, so no codon or amino-acid string is ever built.
+#
+# Frames are named "+1", "+2", "+3" (forward strand, starting at offset
+# 0, 1, 2) and "-1", "-2", "-3" (the same offsets on the reverse complement).
+
+import numpy as np
+
+from seqtools.kmers import decode_kmer, encode
+
+FRAMES = ("+1", "+2", "+3", "-1", "-2", "-3")
+# standard genetic code, indexed by codon code (AAA, AAC, AAG, AAT, ACA, ...)
+GENETIC_CODE = "KNKNTTTTRSRSIIMIQHQHPPPPRRRRLLLLEDEDAAAAGGGGVVVV*Y*YSSSS*CWCLFLF"
+CODONS = [decode_kmer(i, 3) for i in range(64)]
+AMINO_ACIDS = "".join(sorted(set(GENETIC_CODE)))
+
+AA_MATRIX = np.zeros((64, len(AMINO_ACIDS)), dtype=np.int64)
+AA_MATRIX[np.arange(64), [AMINO_ACIDS.index(aa) for aa in GENETIC_CODE]] = 1
+
+
+def reverse_complement_codes(codes):
+    rc = 3 - codes[::-1]
+    rc[rc > 3] = 4
+    return rc
+
+
+def frame_codons(codes, offset):
+    # codon indices of the complete ACGT-only codons read from `offset`
+    m = max(len(codes) - offset, 0) // 3
+    c = codes[offset:offset + 3 * m].reshape(m, 3)
+    idx = (c[:, 0].astype(np.intp) << 4) | (c[:, 1] << 2) | c[:, 2]
+    return idx[(c < 4).all(axis=1)]
+
+
+def codon_counts(seq, frames=FRAMES):
+    # (len(frames), 64) codon counts, one row per frame
+    codes = encode(seq)
+    rc = reverse_complement_codes(codes) if any(f[0] == "-" for f in frames) else None
+    out = np.zeros((len(frames), 64), dtype=np.int64)
+    for row, frame in enumerate(frames):
+        if frame not in FRAMES:
+            raise ValueError(f"Unknown reading frame {frame!r}; expected one of {FRAMES}.")
+        strand = codes if frame[0] == "+" else rc
+        out[row] = np.bincount(frame_codons(strand, int(frame[1]) - 1), minlength=64)
+    return out
+
+
+def aminoacid_counts(counts):
+    # amino-acid counts (columns in AMINO_ACIDS order) from codon counts (..., 64)
+    return counts @ AA_MATRIX
@@ -0,0 +1,184 @@
+# Transparent compressed input for the FASTA readers.
+# Files are recognised by their magic bytes, not by extension:
+#   - BGZF (bgzip) files are split into their independent blocks, which are
+#     inflated in order on a thread pool (zlib releases the GIL);
+#   - plain gzip files are decompressed as a single stream;
+#   - anything else is opened as a normal binary file.
+# BGZF readers can also seek to an uncompressed offset through the block table
+# (stored next to the file in the samtools .gzi layout), which is what the
+# indexed FASTA path uses. With workers=1 blocks are inflated inline, one at
+# a time when read, so a short region query only inflates the blocks it covers.
+
+import bisect
+import gzip
+import io
+import os
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+GZIP_MAGIC = b"\x1f\x8b"
+GZI_SUFFIX = ".gzi"
+BUFFER_SIZE = 1 << 20
+
+
+def detect_format(path):
+    with open(path, "rb") as f:
+        head = f.read(18)
+    if not head.startswith(GZIP_MAGIC):
+        return "plain"
+    # BGZF: gzip with FEXTRA set and a "BC" extra subfield
+    if len(head) >= 18 and head[3] & 4 and head[12:14] == b"BC":
+        return "bgzf"
+    return "gzip"
+
+
+def read_block(f):
+    # returns the raw block (header included) or None at end of file
+    header = f.read(12)
+    if len(header) < 12:
+        return None
+    if header[:2] != GZIP_MAGIC or not header[3] & 4:
+        raise ValueError("Corrupt BGZF block header.")
+    (xlen,) = struct.unpack("<H", header[10:12])
+    extra = f.read(xlen)
+    bsize = None
+    i = 0
+    while i + 4 <= len(extra):
+        (slen,) = struct.unpack("<H", extra[i + 2:i + 4])
+        if extra[i:i + 2] == b"BC":
+            (bsize,) = struct.unpack("<H", extra[i + 4:i + 6])
+        i += 4 + slen
+    if bsize is None:
+        raise ValueError("Gzip block without BGZF size field.")
+    rest = f.read(bsize + 1 - 12 - xlen)
+    return header + extra + rest, 12 + xlen
+
+
+def inflate(block):
+    raw, header_len = block
+    data = zlib.decompress(raw[header_len:-8], -15)
+    crc, isize = struct.unpack("<II", raw[-8:])
+    if isize != len(data) or crc != zlib.crc32(data):
+        raise ValueError("BGZF block failed its CRC check.")
+    return data
+
+
+def build_gzi(path, gzi_path=None):
+    # (compressed offset, uncompressed offset) of every block, without inflating
+    offsets = [(0, 0)]
+    coffset = uoffset = 0
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        while coffset < size:
+            f.seek(coffset)
+            header = f.read(12)
+            (xlen,) = struct.unpack("<H", header[10:12])
+            extra = f.read(xlen)
+            i = extra.index(b"BC")
+            (bsize,) = struct.unpack("<H", extra[i + 4:i + 6])
+            f.seek(coffset + bsize + 1 - 4)
+            (isize,) = struct.unpack("<I", f.read(4))
+            coffset += bsize + 1
+            uoffset += isize
+            offsets.append((coffset, uoffset))
+
+    with open(gzi_path or path + GZI_SUFFIX, "wb") as out:
+        out.write(struct.pack("<Q", len(offsets) - 1))
+        for pair in offsets[1:]:
+            out.write(struct.pack("<QQ", *pair))
+    return offsets
+
+
+def load_gzi(path, gzi_path=None):
+    gzi_path = gzi_path or path + GZI_SUFFIX
+    if (not os.path.exists(gzi_path)
+            or os.path.getmtime(gzi_path) < os.path.getmtime(path)):
+        return build_gzi(path, gzi_path)
+    with open(gzi_path, "rb") as f:
+        (count,) = struct.unpack("<Q", f.read(8))
+        return [(0, 0)] + [struct.unpack("<QQ", f.read(16)) for _ in range(count)]
+
+
+class BgzfReader(io.RawIOBase):
+    def __init__(self, path, workers=None):
+        self.path = path
+        self.f = open(path, "rb")
+        workers = workers or os.cpu_count() or 1
+        self.pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+        self.ahead = 4 * workers if self.pool else 1
+        self.offsets = None
+        self._restart(0, 0, 0)
+
+    def _restart(self, coffset, uoffset, skip):
+        self.f.seek(coffset)
+        self.pending = deque()
+        self.buf = b""
+        self.bufpos = 0
+        self.skip = skip
+        self.upos = uoffset + skip
+        self.eof = False
+
+    def _fill(self):
+        while not self.eof and len(self.pending) < self.ahead:
+            block = read_block(self.f)
+            if block is None:
+                self.eof = True
+            elif self.pool:
+                self.pending.append(self.pool.submit(inflate, block))
+            else:
+                self.pending.append(block)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        while self.bufpos >= len(self.buf):
+            self._fill()
+            if not self.pending:
+                return 0
+            item = self.pending.popleft()
+            self.buf = item.result() if self.pool else inflate(item)
+            self.bufpos, self.skip = self.skip, 0
+        n = min(len(b), len(self.buf) - self.bufpos)
+        b[:n] = self.buf[self.bufpos:self.bufpos + n]
+        self.bufpos += n
+        self.upos += n
+        return n
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.upos
+        elif whence != io.SEEK_SET:
+            raise ValueError("BGZF files only support seeking from the start.")
+        if self.offsets is None:
+            self.offsets = load_gzi(self.path)
+            self.uoffsets = [u for _, u in self.offsets]
+        i = bisect.bisect_right(self.uoffsets, offset) - 1
+        coffset, uoffset = self.offsets[i]
+        self._restart(coffset, uoffset, offset - uoffset)
+        return offset
+
+    def tell(self):
+        return self.upos
+
+    def close(self):
+        if not self.closed:
+            if self.pool:
+                self.pool.shutdown(cancel_futures=True)
+            self.f.close()
+        super().close()
+
+
+def open_binary(path, workers=None):
+    # binary, buffered, readable handle on the (decompressed) file contents
+    fmt = detect_format(path)
+    if fmt == "bgzf":
+        return io.BufferedReader(BgzfReader(path, workers), buffer_size=BUFFER_SIZE)
+    if fmt == "gzip":
+        return gzip.open(path, "rb")
+    return open(path, "rb")
@@ -0,0 +1,129 @@
+# Indexed random access to FASTA files (samtools .fai layout).
+# Every record gets one index line: name, length, offset of its first base,
+# bases per line and bytes per line. fetch() turns a base range into a byte
+# range with that arithmetic and reads only those bytes from disk.
+# bgzip-compressed files are supported: offsets refer to the uncompressed
+# stream and the reader seeks through the BGZF block table. Plain gzip has no
+# random access, so such files have to be recompressed with bgzip first.
+# One handle is kept open for all fetches (a single-threaded BGZF reader
+# without read-ahead, so a region query only inflates the blocks it covers);
+# close() or a with block releases it.
+
+import os
+
+from seqtools.compress import BgzfReader, detect_format, open_binary
+from seqtools.fasta import WHITESPACE
+
+FAI_SUFFIX = ".fai"
+
+
+def build_index(path, fai_path=None):
+    fai_path = fai_path or path + FAI_SUFFIX
+    entries = []
+    name = None
+
+    def close_record():
+        if name is not None:
+            entries.append((name, length, offset, line_bases, line_width))
+
+    with open_binary(path) as f:
+        pos = 0
+        for line in f:
+            if line.startswith(b">"):
+                close_record()
+                fields = line[1:].split()
+                name = fields[0].decode("ascii", "replace") if fields else ""
+                length = 0
+                offset = pos + len(line)
+                line_bases = line_width = 0
+                last_short = False
+            elif name is not None:
+                bases = len(line.rstrip(b"\r\n"))
+                if not bases:
+                    last_short = last_short or bool(line_bases)
+                else:
+                    if last_short or (line_bases and bases > line_bases):
+                        raise ValueError(f"Record {name} in {path} has uneven line lengths and cannot be indexed.")
+                    if not line_bases:
+                        line_bases, line_width = bases, len(line)
+                    elif bases < line_bases or len(line) != line_width:
+                        last_short = True
+                    length += bases
+            pos += len(line)
+        close_record()
+
+    with open(fai_path, "w") as out:
+        for entry in entries:
+            out.write("\t".join(str(v) for v in entry) + "\n")
+    return entries
+
+
+class FastaIndex:
+    def __init__(self, path, fai_path=None):
+        self.path = path
+        self.handle = None
+        self.format = detect_format(path)
+        if self.format == "gzip":
+            raise ValueError(f"{path} is plain gzip; recompress it with bgzip to index it.")
+        fai_path = fai_path or path + FAI_SUFFIX
+        if (not os.path.exists(fai_path)
+                or os.path.getmtime(fai_path) < os.path.getmtime(path)):
+            build_index(path, fai_path)
+
+        self.entries = {}
+        self.names = []
+        with open(fai_path) as f:
+            for line in f:
+                name, length, offset, line_bases, line_width = line.rstrip("\n").split("\t")[:5]
+                self.entries[name] = (int(length), int(offset), int(line_bases), int(line_width))
+                self.names.append(name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+
+    def _read(self, offset, size):
+        if self.handle is None:
+            self.handle = (BgzfReader(self.path, workers=1) if self.format == "bgzf"
+                           else open(self.path, "rb"))
+        self.handle.seek(offset)
+        # a raw BGZF read stops at the end of a block
+        parts = []
+        while size > 0:
+            data = self.handle.read(size)
+            if not data:
+                break
+            parts.append(data)
+            size -= len(data)
+        return b"".join(parts)
+
+    def length(self, name):
+        return self.entries[name][0]
+
+    def _byte_offset(self, name, pos):
+        _, offset, line_bases, line_width = self.entries[name]
+        if not line_bases:
+            return offset
+        return offset + pos // line_bases * line_width + pos % line_bases
+
+    def fetch(self, name, start=0, end=None, upper=True):
+        # bases [start, end) of record `name`, 0-based like Python slices
+        length = self.entries[name][0]
+        start = max(0, start)
+        end = length if end is None else min(end, length)
+        if end <= start:
+            return ""
+
+        first = self._byte_offset(name, start)
+        last = self._byte_offset(name, end - 1) + 1
+        seq = self._read(first, last - first).translate(None, WHITESPACE)
+        if upper:
+            seq = seq.upper()
+        return seq.decode("ascii", "replace")
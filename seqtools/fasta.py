@@ -0,0 +1,69 @@
+# Streaming FASTA reader shared by the labs.
+# The file is read in large binary blocks and every record is yielded as soon
+# as it is complete, so only one record is kept in memory at a time and the
+# load time stays linear (no "seq += line" string copies). gzip and bgzip
+# files are decompressed on the fly (see seqtools.compress).
+
+from seqtools.compress import open_binary
+
+CHUNK_SIZE = 1 << 20
+WHITESPACE = b" \t\r\n"
+
+
+def iter_fasta_bytes(handle, chunk_size=CHUNK_SIZE):
+    # handle is a binary file object; yields (header, sequence bytes)
+    header = None
+    seq = bytearray()
+    pending = b""
+    line_start = True
+
+    while True:
+        block = handle.read(chunk_size)
+        if not block:
+            break
+        data = pending + block if pending else block
+        pending = b""
+        i = 0
+        n = len(data)
+
+        while i < n:
+            if line_start and data[i] == 62:  # '>'
+                nl = data.find(b"\n", i)
+                if nl == -1:
+                    pending = data[i:]
+                    break
+                if header is not None:
+                    yield header, bytes(seq)
+                header = data[i + 1:nl].decode("ascii", "replace").strip()
+                seq = bytearray()
+                i = nl + 1
+                continue
+
+            j = data.find(b"\n>", i)
+            end = n if j == -1 else j + 1
+            if header is not None:
+                seq += data[i:end].translate(None, WHITESPACE)
+            line_start = j != -1 or data[end - 1] == 10
+            i = end
+
+    if pending:
+        if header is not None:
+            yield header, bytes(seq)
+        header = pending[1:].decode("ascii", "replace").strip()
+        seq = bytearray()
+    if header is not None:
+        yield header, bytes(seq)
+
+
+def iter_fasta(path, upper=True, chunk_size=CHUNK_SIZE):
+    # yields (header, sequence) records as str
+    with open_binary(path) as f:
+        for header, seq in iter_fasta_bytes(f, chunk_size):
+            if upper:
+                seq = seq.upper()
+            yield header, seq.decode("ascii", "replace")
+
+
+def read_fasta(path):
+    # all records of the file as one uppercase sequence (single join)
+    return "".join(seq for _, seq in iter_fasta(path))
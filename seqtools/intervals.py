@@ -0,0 +1,64 @@
+# Above-threshold intervals of window signals.
+# The runs of a signal at or above a threshold are found from the edges of
+# its boolean mask (np.diff), runs separated by at most merge_gap windows are
+# joined, and short runs are dropped, all without a Python loop over windows.
+# Each interval is (start, end, max, mean) in window indices, end exclusive;
+# max and mean are taken over the whole interval, merged gaps included. NaN
+# never counts as above the threshold.
+#
+# write_bed converts window indices to sequence coordinates (a window i covers
+# [i * step, i * step + window_size)) and writes one BED line per interval.
+
+import numpy as np
+
+
+def find_intervals(mask, merge_gap=0, min_length=1):
+    # (starts, ends) of the True runs of mask
+    edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if merge_gap > 0 and len(starts) > 1:
+        keep = (starts[1:] - ends[:-1]) > merge_gap
+        starts = starts[np.concatenate(([True], keep))]
+        ends = ends[np.concatenate((keep, [True]))]
+    long_enough = (ends - starts) >= min_length
+    return starts[long_enough], ends[long_enough]
+
+
+def threshold_intervals(signal, threshold, merge_gap=0, min_length=1):
+    # [(start, end, max, mean)] of the regions where signal >= threshold
+    signal = np.asarray(signal, dtype=np.float64)
+    with np.errstate(invalid="ignore"):
+        mask = signal >= threshold
+    starts, ends = find_intervals(mask, merge_gap, min_length)
+    if not len(starts):
+        return []
+    # reduceat over interleaved (start, end) bounds; the -inf sentinel keeps an
+    # end equal to len(signal) a valid index
+    values = np.append(np.nan_to_num(signal, nan=-np.inf), -np.inf)
+    peaks = np.maximum.reduceat(values, np.column_stack((starts, ends)).ravel())[::2]
+    sums = np.concatenate(([0.0], np.cumsum(np.nan_to_num(signal))))
+    valid = np.concatenate(([0], np.cumsum(~np.isnan(signal))))
+    means = (sums[ends] - sums[starts]) / np.maximum(valid[ends] - valid[starts], 1)
+    return list(zip(starts.tolist(), ends.tolist(), peaks.tolist(), means.tolist()))
+
+
+def to_sequence_coords(start, end, window_size=1, step=1):
+    # bases covered by windows start..end-1
+    return start * step, (end - 1) * step + window_size
+
+
+def write_bed(out, intervals, chrom, window_size=1, step=1, label=None):
+    # out: a path or an open text file; the name column holds the statistics
+    own = isinstance(out, str)
+    f = open(out, "w") if own else out
+    try:
+        for start, end, peak, mean in intervals:
+            bed_start, bed_end = to_sequence_coords(start, end, window_size, step)
+            name = f"max={peak:.2f};mean={mean:.2f}"
+            if label:
+                name = f"{label};{name}"
+            f.write(f"{chrom}\t{bed_start}\t{bed_end}\t{name}\n")
+    finally:
+        if own:
+            f.close()
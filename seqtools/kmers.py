@@ -0,0 +1,149 @@
+# k-mer counting on 2-bit codes.
+# Bases are encoded A=0, C=1, G=2, T=3 and every k-mer window gets the integer
+# value of its k base-4 digits, shifted in one base at a time (packed.kmer_codes),
+# so no substring is ever sliced. Windows touching an N or another non-ACGT
+# symbol are skipped. Up to DENSE_MAX_K the counts land in a dense 4**k array
+# from a single np.bincount; above that a dense table would not fit, so the
+# observed codes are counted sparsely into a {code: count} dict.
+#
+# Code order is lexicographic order of the k-mers (A < C < G < T).
+#
+# With canonical=True a k-mer and its reverse complement are counted together
+# under the smaller of the two codes. The reverse complement is computed on
+# the codes themselves (packed.revcomp_codes), never on strings; for short k
+# the canonical code of every possible k-mer is tabulated once and looked up,
+# so both strands cost about as much as one.
+
+import numpy as np
+
+from seqtools.composition import as_bytes
+from seqtools.packed import BASES, ENCODE, kmer_codes, revcomp_codes
+
+DENSE_MAX_K = 12
+MAX_K = 31
+CHUNK_BASES = 1 << 22
+CANONICAL_TABLE_MAX_K = 10
+
+_canonical_tables = {}
+
+
+def encode(seq):
+    # uint8 codes of a str/bytes sequence; code arrays are passed through
+    if isinstance(seq, np.ndarray):
+        return seq
+    return ENCODE[np.frombuffer(as_bytes(seq), dtype=np.uint8)]
+
+
+def canonical_codes(kmers, k):
+    # the smaller of each k-mer code and its reverse complement
+    if k > CANONICAL_TABLE_MAX_K:
+        return np.minimum(kmers, revcomp_codes(kmers, k))
+    table = _canonical_tables.get(k)
+    if table is None:
+        every = np.arange(4 ** k, dtype=np.int64)
+        table = _canonical_tables[k] = np.minimum(every, revcomp_codes(every, k))
+    return table[kmers]
+
+
+def spectrum_codes(seq, ks, canonical=False):
+    # {k: codes of the clean k-mer windows} for every k in ks from one pass:
+    # the codes of the longest k are built once (the sequence is padded so
+    # that every position starts one) and a shorter k-mer is the leading
+    # digits of the longer code starting at the same position
+    ks = sorted(set(ks))
+    if not ks or not 1 <= ks[0] <= ks[-1] <= MAX_K:
+        raise ValueError(f"k must be between 1 and {MAX_K}, got {ks}.")
+    codes = encode(seq)
+    n = len(codes)
+    top = ks[-1]
+    masked = codes == 4
+    # N (code 4) would carry into the neighbouring digit; those windows are
+    # dropped through the mask anyway, so build from the low two bits only
+    padded = np.concatenate((codes & 3, np.zeros(top - 1, dtype=np.uint8)))
+    longest = kmer_codes(padded, top)
+    bad = np.concatenate(([0], np.cumsum(masked, dtype=np.int64))) if masked.any() else None
+
+    out = {}
+    for k in ks:
+        m = max(n - k + 1, 0)
+        kmers = longest[:m] >> (2 * (top - k))
+        if bad is not None:
+            kmers = kmers[bad[k:] == bad[:m]]
+        if canonical:
+            kmers = canonical_codes(kmers, k)
+        out[k] = kmers
+    return out
+
+
+def valid_kmer_codes(seq, k, canonical=False):
+    # codes of all k-mer windows that contain only A, C, G and T
+    return spectrum_codes(seq, [k], canonical)[k]
+
+
+def unique_counts(kmers, first_seen=False):
+    # distinct codes in increasing order with their counts, plus the index of
+    # each one's first occurrence when first_seen is set; a sort and a split
+    # into runs, which is much faster than np.unique on integer codes
+    order = np.argsort(kmers, kind="stable") if first_seen else None
+    ordered = kmers[order] if first_seen else np.sort(kmers)
+    starts = np.flatnonzero(ordered[1:] != ordered[:-1]) + 1
+    if len(ordered):
+        starts = np.concatenate(([0], starts))
+    counts = np.diff(np.append(starts, len(ordered)))
+    if first_seen:
+        return ordered[starts], counts, order[starts]
+    return ordered[starts], counts
+
+
+def tally(kmers, k):
+    # dense 4**k count array for k <= DENSE_MAX_K, {code: count} dict above
+    if k <= DENSE_MAX_K:
+        return np.bincount(kmers, minlength=4 ** k)
+    values, counts = unique_counts(kmers)
+    return dict(zip(values.tolist(), counts.tolist()))
+
+
+def count_kmers(seq, k, canonical=False):
+    return tally(valid_kmer_codes(seq, k, canonical), k)
+
+
+def kmer_spectrum(seq, ks, canonical=False):
+    # {k: counts} for every k in ks, counted in a single scan of seq
+    return {k: tally(kmers, k) for k, kmers in spectrum_codes(seq, ks, canonical).items()}
+
+
+def decode_kmer(code, k):
+    return "".join(chr(BASES[(code >> (2 * (k - 1 - i))) & 3]) for i in range(k))
+
+
+def to_dict(kmers, k, first_seen=False):
+    # {kmer: count} of the given k-mer codes, in lexicographic order or, with
+    # first_seen=True, in the order they first occur
+    if first_seen:
+        values, counts, first = unique_counts(kmers, first_seen=True)
+        order = np.argsort(first, kind="stable")
+        values, counts = values[order], counts[order]
+    elif k <= DENSE_MAX_K:
+        table = np.bincount(kmers, minlength=4 ** k)
+        values = np.flatnonzero(table)
+        counts = table[values]
+    else:
+        values, counts = unique_counts(kmers)
+    return {decode_kmer(v, k): c for v, c in zip(values.tolist(), counts.tolist())}
+
+
+def kmer_dict(seq, k, first_seen=False, canonical=False):
+    return to_dict(valid_kmer_codes(seq, k, canonical), k, first_seen)
+
+
+def kmer_dicts(seq, ks, first_seen=False, canonical=False):
+    # {k: {kmer: count}} for every k in ks, from a single scan of seq
+    spectrum = spectrum_codes(seq, ks, canonical)
+    return {k: to_dict(kmers, k, first_seen) for k, kmers in spectrum.items()}
+
+
+def iter_kmer_chunks(seq, k, chunk_size=CHUNK_BASES, canonical=False):
+    # valid k-mer codes of seq, a chunk of about chunk_size windows at a time
+    # (neighbouring chunks overlap by k - 1 bases, so no window is lost)
+    for start in range(0, max(len(seq) - k + 1, 0), chunk_size):
+        yield valid_kmer_codes(seq[start:start + chunk_size + k - 1], k, canonical)
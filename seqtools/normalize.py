@@ -0,0 +1,64 @@
+# Table-driven sequence normalization.
+# bytes.translate uppercases the sequence and deletes everything that is not
+# a letter (whitespace, digits, gaps, '*') in one C-level pass. N and the
+# other IUPAC symbols are then handled by a policy:
+#   "drop"  - remove them, leaving a pure ACGT sequence (what the labs did);
+#   "mask"  - keep them in place and return a boolean mask of their positions;
+#   "split" - cut the sequence into clean ACGT contigs at every ambiguous run.
+# Window kernels can then ask clean_windows(mask, w) which windows are valid
+# instead of re-checking every window's characters.
+
+import re
+import string
+
+import numpy as np
+
+from seqtools.packed import ENCODE, clean_windows
+
+POLICIES = ("drop", "mask", "split")
+
+LETTERS = string.ascii_letters.encode()
+UPPER = bytes.maketrans(string.ascii_lowercase.encode(), string.ascii_uppercase.encode())
+NON_LETTERS = bytes(b for b in range(256) if b not in LETTERS)
+AMBIGUOUS = bytes(b for b in string.ascii_uppercase.encode() if b not in b"ACGT")
+CLEAN_RUN = re.compile(rb"[ACGT]+")
+
+
+def as_bytes(seq):
+    return seq.encode("ascii", "replace") if isinstance(seq, str) else bytes(seq)
+
+
+def letters_only(seq):
+    return as_bytes(seq).translate(UPPER, NON_LETTERS)
+
+
+def clean_sequence(seq):
+    # uppercase ACGT only ("drop" policy)
+    return letters_only(seq).translate(None, AMBIGUOUS).decode("ascii")
+
+
+def mask_sequence(seq):
+    # uppercase letters with N/IUPAC kept in place, plus their mask ("mask" policy)
+    data = letters_only(seq)
+    mask = ENCODE[np.frombuffer(data, dtype=np.uint8)] == 4
+    return data.decode("ascii"), mask
+
+
+def split_contigs(seq, min_len=1):
+    # (start, contig) for every clean ACGT run ("split" policy); start is the
+    # position in the letters-only sequence
+    data = letters_only(seq)
+    return [(m.start(), m.group().decode("ascii"))
+            for m in CLEAN_RUN.finditer(data) if m.end() - m.start() >= min_len]
+
+
+def normalize(seq, policy="drop"):
+    # returns (sequence, mask) for "drop"/"mask" and (contigs, None) for "split"
+    if policy == "drop":
+        return clean_sequence(seq), None
+    if policy == "mask":
+        return mask_sequence(seq)
+    if policy == "split":
+        return split_contigs(seq), None
+    raise ValueError(f"Unknown policy {policy!r}; expected one of {POLICIES}.")
+
@@ -0,0 +1,234 @@
+# 2-bit packed genome store.
+# A FASTA file is written once as 4 bases per byte (A=0, C=1, G=2, T=3) and
+# the non-ACGT symbols (N and IUPAC codes) are kept aside as runs of
+# (start, length, symbol). Reopening memory-maps the packed bytes, so scans
+# index the genome directly instead of holding it as a Python str.
+#
+# Layout: MAGIC | uint64 length | packed bases | JSON trailer | uint64 trailer offset
+#
+# Whole-genome scans read codes(start, end) chunk by chunk, so only one
+# chunk is ever unpacked; kmer_dtype gives the narrowest code type for k.
+
+import bisect
+import json
+import os
+import struct
+
+import numpy as np
+
+from seqtools.compress import open_binary
+from seqtools.fasta import iter_fasta_bytes
+
+MAGIC = b"PK2\x01"
+DATA_OFFSET = 12
+SUFFIX = ".pk2"
+BASES = b"ACGT"
+CHUNK_BASES = 1 << 20
+
+ENCODE = np.full(256, 4, dtype=np.uint8)
+for _code, _base in enumerate(BASES):
+    ENCODE[_base] = _code
+    ENCODE[ord(chr(_base).lower())] = _code
+DECODE = np.frombuffer(BASES, dtype=np.uint8)
+
+
+def pack_codes(codes):
+    # codes: uint8 array of 0..3 whose length is a multiple of 4
+    c = codes.reshape(-1, 4)
+    return (c[:, 0] << 6) | (c[:, 1] << 4) | (c[:, 2] << 2) | c[:, 3]
+
+
+def unpack_codes(packed):
+    out = np.empty((len(packed), 4), dtype=np.uint8)
+    out[:, 0] = packed >> 6
+    out[:, 1] = (packed >> 4) & 3
+    out[:, 2] = (packed >> 2) & 3
+    out[:, 3] = packed & 3
+    return out.reshape(-1)
+
+
+def kmer_dtype(k):
+    # smallest unsigned type holding every k-mer code
+    return np.dtype(np.uint16 if k <= 8 else np.uint32 if k <= 16 else np.uint64)
+
+
+def kmer_codes(codes, k, dtype=np.int64):
+    # integer code of every k-mer window (base 4, first base most significant)
+    n = len(codes) - k + 1
+    if n <= 0:
+        return np.empty(0, dtype=dtype)
+    out = np.zeros(n, dtype=dtype)
+    for i in range(k):
+        out <<= 2
+        out |= codes[i:i + n]
+    return out
+
+
+REVERSE_STEPS = [(2, 0x3333333333333333), (4, 0x0F0F0F0F0F0F0F0F), (8, 0x00FF00FF00FF00FF),
+                 (16, 0x0000FFFF0000FFFF), (32, 0x00000000FFFFFFFF)]
+
+
+def revcomp_codes(kmers, k):
+    # reverse complement of k-mer codes (k <= 32): complementing a base is
+    # code ^ 3, so the word is inverted and its 2-bit digits reversed with
+    # mask-and-shift swaps, only as many as the smallest power-of-two bit
+    # width holding k digits needs, in the narrowest unsigned type of that
+    # width; the k digits are then shifted down
+    width = 4
+    while width < 2 * k:
+        width *= 2
+    word = np.dtype(f"uint{max(width, 8)}").type
+    ones = (1 << 8 * word(0).itemsize) - 1
+    x = ~kmers.astype(word, copy=False)
+    for shift, mask in REVERSE_STEPS:
+        if shift >= width:
+            break
+        x = ((x >> word(shift)) & word(mask & ones)) | ((x & word(mask & ones)) << word(shift))
+    if width < 8 * word(0).itemsize:
+        x &= word((1 << width) - 1)
+    return (x >> word(width - 2 * k)).astype(kmers.dtype, copy=False)
+
+
+def clean_windows(mask, k):
+    # True for every k-window that contains no masked position
+    bad = np.concatenate(([0], np.cumsum(mask, dtype=np.int64)))
+    return (bad[k:] - bad[:-k]) == 0 if len(mask) >= k else np.empty(0, dtype=bool)
+
+
+def find_runs(raw, codes, offset=0):
+    # runs of identical non-ACGT symbols as (start, length, symbol)
+    idx = np.flatnonzero(codes == 4)
+    if not len(idx):
+        return []
+    syms = raw[idx]
+    breaks = np.flatnonzero((np.diff(idx) != 1) | (np.diff(syms) != 0)) + 1
+    starts = np.concatenate(([0], breaks))
+    ends = np.concatenate((breaks, [len(idx)]))
+    return [[int(idx[s]) + offset, int(e - s), chr(syms[s]).upper()] for s, e in zip(starts, ends)]
+
+
+def write_packed(fasta_path, out_path):
+    records = []
+    runs = []
+    carry = np.empty(0, dtype=np.uint8)
+    length = 0
+
+    with open_binary(fasta_path) as src, open(out_path, "wb") as out:
+        out.write(MAGIC)
+        out.write(struct.pack("<Q", 0))
+        for header, seq in iter_fasta_bytes(src):
+            raw = np.frombuffer(seq, dtype=np.uint8)
+            codes = ENCODE[raw]
+            runs.extend(find_runs(raw, codes, length))
+            records.append([header, length, len(raw)])
+            length += len(raw)
+
+            codes[codes == 4] = 0
+            codes = np.concatenate((carry, codes))
+            full = len(codes) - len(codes) % 4
+            out.write(pack_codes(codes[:full]).tobytes())
+            carry = codes[full:]
+
+        if len(carry):
+            tail = np.zeros(4, dtype=np.uint8)
+            tail[:len(carry)] = carry
+            out.write(pack_codes(tail).tobytes())
+
+        trailer_offset = out.tell()
+        out.write(json.dumps({"records": records, "runs": runs}).encode())
+        out.write(struct.pack("<Q", trailer_offset))
+        out.seek(len(MAGIC))
+        out.write(struct.pack("<Q", length))
+
+
+class PackedGenome:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a packed genome file.")
+            (self.length,) = struct.unpack("<Q", f.read(8))
+            f.seek(-8, os.SEEK_END)
+            (trailer_offset,) = struct.unpack("<Q", f.read(8))
+            f.seek(trailer_offset)
+            trailer = json.loads(f.read()[:-8])
+
+        self.path = path
+        self.records = [tuple(r) for r in trailer["records"]]
+        self.runs = [tuple(r) for r in trailer["runs"]]
+        self._run_starts = [r[0] for r in self.runs]
+        if self.length:
+            self.packed = np.memmap(path, dtype=np.uint8, mode="r",
+                                    offset=DATA_OFFSET, shape=((self.length + 3) // 4,))
+        else:
+            self.packed = np.empty(0, dtype=np.uint8)
+
+    def __len__(self):
+        return self.length
+
+    def _bounds(self, start, end):
+        start = 0 if start is None else max(0, start)
+        end = self.length if end is None else min(end, self.length)
+        return start, max(start, end)
+
+    def _runs_in(self, start, end):
+        i = max(0, bisect.bisect_right(self._run_starts, start) - 1)
+        while i < len(self.runs) and self.runs[i][0] < end:
+            run_start, run_len, symbol = self.runs[i]
+            if run_start + run_len > start:
+                yield max(run_start, start), min(run_start + run_len, end), symbol
+            i += 1
+
+    def codes(self, start=None, end=None):
+        # 2-bit codes (0..3) of [start, end); ambiguous positions read as 0
+        start, end = self._bounds(start, end)
+        first = start // 4
+        unpacked = unpack_codes(self.packed[first:(end + 3) // 4])
+        return unpacked[start - first * 4:end - first * 4]
+
+    def mask(self, start=None, end=None):
+        # True where the genome holds N or another IUPAC symbol
+        start, end = self._bounds(start, end)
+        mask = np.zeros(end - start, dtype=bool)
+        for s, e, _ in self._runs_in(start, end):
+            mask[s - start:e - start] = True
+        return mask
+
+    def fetch(self, start=None, end=None):
+        start, end = self._bounds(start, end)
+        seq = DECODE[self.codes(start, end)]
+        for s, e, symbol in self._runs_in(start, end):
+            seq[s - start:e - start] = ord(symbol)
+        return seq.tobytes().decode("ascii")
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            if key.step not in (None, 1):
+                raise ValueError("Packed genomes only support contiguous slices.")
+            start, end, _ = key.indices(self.length)
+            return self.fetch(start, end)
+        if key < 0:
+            key += self.length
+        return self.fetch(key, key + 1)
+
+    def record(self, name):
+        for header, start, length in self.records:
+            if header == name or header.split()[0] == name:
+                return start, length
+        raise KeyError(name)
+
+    def base_counts(self):
+        counts = np.zeros(4, dtype=np.int64)
+        for start in range(0, self.length, CHUNK_BASES):
+            counts += np.bincount(self.codes(start, start + CHUNK_BASES), minlength=4)
+        for _, run_len, _ in self.runs:
+            counts[0] -= run_len
+        return {chr(b): int(c) for b, c in zip(BASES, counts)}
+
+
+def open_genome(fasta_path, packed_path=None):
+    # packs the FASTA the first time (or when it changed) and memory-maps it
+    packed_path = packed_path or fasta_path + SUFFIX
+    if (not os.path.exists(packed_path)
+            or os.path.getmtime(packed_path) < os.path.getmtime(fasta_path)):
+        write_packed(fasta_path, packed_path)
+    return PackedGenome(packed_path)
@@ -0,0 +1,159 @@
+# Parallel k-mer counting over shared memory.
+# The 2-bit codes of every sequence are copied once into a shared memory
+# block; worker processes attach to it and count their chunks in place, so
+# no sequence data is pickled per task. Chunks never cross a record boundary
+# and neighbouring chunks of a record overlap by k - 1 bases, so every window
+# is counted by exactly one chunk and the summed counts equal a serial count.
+# Up to kmers.DENSE_MAX_K the counts go into one dense 4**k table, also in
+# shared memory: every chunk is counted on its own (sorted unique codes, or a
+# bincount when the table is no larger than the chunk) and added into the
+# table under a lock, so worker memory follows the chunk size rather than
+# 4**k and does not grow with the number of workers. Above DENSE_MAX_K
+# workers return the nonzero (code, count) pairs of their chunks, merged into
+# a {code: count} dict, as with kmers.count_kmers.
+#
+# As with batch.map_genomes, scripts calling this from a worker pool must keep
+# that code under `if __name__ == "__main__":`.
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from seqtools.kmers import CHUNK_BASES, DENSE_MAX_K, encode, unique_counts, valid_kmer_codes
+
+_codes = None
+_shm = None
+_table = None
+_table_shm = None
+_lock = None
+
+
+def _attach(name, size, table_name=None, table_size=0, lock=None):
+    global _codes, _shm, _table, _table_shm, _lock
+    _shm = shared_memory.SharedMemory(name=name)
+    _codes = np.ndarray((size,), dtype=np.uint8, buffer=_shm.buf)
+    if table_name:
+        _table_shm = shared_memory.SharedMemory(name=table_name)
+        _table = np.ndarray((table_size,), dtype=np.int64, buffer=_table_shm.buf)
+        _lock = lock
+
+
+def count_ranges(codes, ranges, k, canonical=False):
+    # nonzero (values, counts) of the k-mers of the (start, end) chunks of codes
+    if k > DENSE_MAX_K:
+        parts = [unique_counts(valid_kmer_codes(codes[start:end], k, canonical))
+                 for start, end in ranges]
+        return merge_counts(parts, k, dense=False)
+    table = np.zeros(4 ** k, dtype=np.int64)
+    for start, end in ranges:
+        kmers = valid_kmer_codes(codes[start:end], k, canonical)
+        if 8 * len(kmers) < len(table):
+            np.add.at(table, kmers, 1)
+        else:
+            table += np.bincount(kmers, minlength=len(table))
+    values = np.flatnonzero(table)
+    return values, table[values]
+
+
+def _count_shared(ranges, k, canonical):
+    # runs in a worker, on the shared codes
+    return count_ranges(_codes, ranges, k, canonical)
+
+
+def _add_shared(ranges, k, canonical):
+    # runs in a worker: adds the counts of every chunk into the shared table
+    for start, end in ranges:
+        kmers = valid_kmer_codes(_codes[start:end], k, canonical)
+        if len(_table) <= len(kmers):
+            counts = np.bincount(kmers, minlength=len(_table))
+            with _lock:
+                _table[:] += counts
+        else:
+            values, counts = unique_counts(kmers)
+            with _lock:
+                _table[values] += counts
+
+
+def merge_counts(parts, k, dense=True):
+    # sum of (values, counts) pairs; dense gives the final count_kmers form
+    parts = list(parts)
+    if k <= DENSE_MAX_K:
+        table = np.zeros(4 ** k, dtype=np.int64)
+        for values, counts in parts:
+            table[values] += counts
+        if dense:
+            return table
+        values = np.flatnonzero(table)
+        return values, table[values]
+    if not parts:
+        values = counts = np.empty(0, dtype=np.int64)
+    else:
+        values = np.concatenate([v for v, _ in parts])
+        counts = np.concatenate([c for _, c in parts])
+        order = np.argsort(values, kind="stable")
+        values, counts = values[order], counts[order]
+        starts = np.flatnonzero(values[1:] != values[:-1]) + 1
+        starts = np.concatenate(([0], starts)) if len(values) else starts
+        values, counts = values[starts], np.add.reduceat(counts, starts) if len(starts) else counts
+    if dense:
+        return dict(zip(values.tolist(), counts.tolist()))
+    return values, counts
+
+
+def chunk_ranges(bounds, k, chunk_size):
+    # (start, end) of every chunk; bounds are the (start, end) of the records
+    ranges = []
+    for rec_start, rec_end in bounds:
+        last = rec_end - k + 1
+        for start in range(rec_start, last, chunk_size):
+            ranges.append((start, min(start + chunk_size, last) + k - 1))
+    return ranges
+
+
+def count_kmers_parallel(seqs, k, workers=None, chunk_size=CHUNK_BASES, canonical=False):
+    # k-mer counts of one sequence or a list of them (a panel, counted as
+    # separate records), identical to summing kmers.count_kmers over them
+    if isinstance(seqs, (str, bytes, bytearray, np.ndarray)):
+        seqs = [seqs]
+    codes = [encode(s) for s in seqs]
+    lengths = [len(c) for c in codes]
+    ends = np.cumsum(lengths, dtype=np.int64).tolist()
+    bounds = list(zip([0] + ends[:-1], ends))
+    ranges = chunk_ranges(bounds, k, chunk_size)
+    size = max(sum(lengths), 1)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        joined = np.concatenate(codes) if codes else np.empty(0, dtype=np.uint8)
+        return merge_counts([count_ranges(joined, ranges, k, canonical)], k)
+
+    dense = k <= DENSE_MAX_K
+    shm = shared_memory.SharedMemory(create=True, size=size)
+    table_shm = None
+    try:
+        shared = np.ndarray((size,), dtype=np.uint8, buffer=shm.buf)
+        for (start, end), c in zip(bounds, codes):
+            shared[start:end] = c
+        del shared
+        initargs = (shm.name, size)
+        if dense:
+            # a fresh shared memory block is zero-filled
+            table_shm = shared_memory.SharedMemory(create=True, size=8 * 4 ** k)
+            initargs += (table_shm.name, 4 ** k, multiprocessing.Lock())
+        # a few tasks per worker, each covering an interleaved share of the chunks
+        n_tasks = min(4 * workers, len(ranges))
+        tasks = [ranges[i::n_tasks] for i in range(n_tasks)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                 initargs=initargs) as pool:
+            parts = list(pool.map(_add_shared if dense else _count_shared,
+                                  tasks, [k] * n_tasks, [canonical] * n_tasks))
+        if dense:
+            return np.ndarray((4 ** k,), dtype=np.int64, buffer=table_shm.buf).copy()
+        return merge_counts(parts, k)
+    finally:
+        for block in (shm, table_shm):
+            if block is not None:
+                block.close()
+                block.unlink()
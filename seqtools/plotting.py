@@ -0,0 +1,94 @@
+# Decimated line plots for long window signals.
+# Drawing every window of a genome-scale profile hands matplotlib millions of
+# vertices, while the axes are only a few hundred to a few thousand pixels
+# wide. plot_signal draws a min/max-per-bucket reduction instead: the visible
+# x range is cut into about one bucket per pixel and only the smallest and
+# largest value of each bucket are kept (in their original order), so peaks
+# and dips survive and at most 2 * buckets points are drawn. The full signal
+# is kept on the DecimatedLine; on zoom or pan the axes' xlim_changed
+# callback recomputes the reduction for the new range, down to the raw
+# values once few enough windows are visible.
+# NaN values (e.g. windows with N) only show up in buckets with nothing else.
+# plot_envelope draws an already binned signal (the per-bin min and max of
+# windows.BinReducer) the same way, so peaks inside a bin are not lost.
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+MIN_BUCKETS = 200
+
+
+def minmax_indices(y, buckets):
+    # sorted indices of the min and max of every bucket of y
+    m = len(y)
+    if m <= 2 * buckets:
+        return np.arange(m)
+    size = -(-m // buckets)
+    # the last bucket is padded with its final value; argmin/argmax return
+    # the first of equal values, so a padding slot is never picked
+    pad = -m % size
+    low = high = y
+    if y.dtype.kind == "f":
+        low, high = np.nan_to_num(y, nan=np.inf), np.nan_to_num(y, nan=-np.inf)
+    if pad:
+        low = np.concatenate((low, np.repeat(low[-1:], pad)))
+        high = np.concatenate((high, np.repeat(high[-1:], pad)))
+    starts = np.arange(0, m + pad, size)
+    idx = np.stack((starts + low.reshape(-1, size).argmin(axis=1),
+                    starts + high.reshape(-1, size).argmax(axis=1)), axis=1)
+    idx = np.sort(idx, axis=1).ravel()
+    # a bucket whose min and max are the same point only needs it once
+    keep = np.ones(len(idx), dtype=bool)
+    keep[1:] = idx[1:] != idx[:-1]
+    return idx[keep]
+
+
+class DecimatedLine:
+    def __init__(self, ax, y, x=None, buckets=None, **kwargs):
+        self.ax = ax
+        self.y = np.asarray(y)
+        self.x = None if x is None else np.asarray(x)
+        self.buckets = buckets
+        self.line, = ax.plot(*self._reduce(0, len(self.y)), **kwargs)
+        # a plain function: the callback registry would only keep a weak
+        # reference to a bound method
+        ax.callbacks.connect("xlim_changed", lambda ax: self.update())
+
+    def _positions(self, idx):
+        return idx if self.x is None else self.x[idx]
+
+    def _bucket_count(self):
+        if self.buckets:
+            return self.buckets
+        return max(MIN_BUCKETS, int(self.ax.bbox.width))
+
+    def _reduce(self, lo, hi):
+        idx = lo + minmax_indices(self.y[lo:hi], self._bucket_count())
+        return self._positions(idx), self.y[idx]
+
+    def update(self):
+        # window indices covering the visible x range plus one on each side,
+        # so the line still runs to the edges of the axes
+        left, right = sorted(self.ax.get_xlim())
+        if self.x is None:
+            lo, hi = int(np.floor(left)), int(np.ceil(right)) + 1
+        else:
+            lo, hi = np.searchsorted(self.x, left), np.searchsorted(self.x, right, "right")
+        lo = max(int(lo) - 1, 0)
+        hi = min(int(hi) + 1, len(self.y))
+        if lo >= hi:
+            return
+        self.line.set_data(*self._reduce(lo, hi))
+
+
+def plot_signal(y, x=None, ax=None, buckets=None, **kwargs):
+    # drop-in for plt.plot(x, y, **kwargs) on long signals; x must be increasing
+    return DecimatedLine(ax if ax is not None else plt.gca(), y, x, buckets, **kwargs)
+
+
+def plot_envelope(low, high, x=None, ax=None, buckets=None, **kwargs):
+    # plot_signal of a binned signal: every bin contributes its min and its
+    # max at the bin position x
+    y = np.column_stack((low, high)).ravel()
+    x = np.repeat(np.arange(len(y) // 2) if x is None else np.asarray(x), 2)
+    return plot_signal(y, x, ax, buckets, **kwargs)
@@ -0,0 +1,225 @@
+# Genome-wide PCR primer candidates.
+# Every window of 18-25 bases is a candidate forward primer (the window as
+# read) and a candidate reverse primer (its reverse complement), so both
+# strands are covered by scanning the forward strand only: a window and its
+# reverse complement form the same duplex and share Tm and GC content, and
+# only the 3' end differs (the last base of the window for a forward primer,
+# the complement of the first base for a reverse one).
+#
+# The filters are applied to all windows of a length at once, cheapest first:
+#   - no N/IUPAC symbol, GC% in range (prefix sums of G+C);
+#   - no homopolymer run longer than max_run;
+#   - GC clamp (unless clamp=False): the 3' base is G or C and at most
+#     max_clamp_gc of the last clamp_window bases are G/C;
+#   - the 3' k-mer (three_prime_k bases) occurs once in the genome on either
+#     strand, looked up in a canonical k-mer count table built once;
+#   - Tm in range, evaluated only for the windows left (nearest-neighbour
+#     model from shared stack sums, or the Wallace / salt-adjusted formulas).
+# Overlapping windows of neighbouring lengths make millions of candidates on
+# a bacterial genome, far too many to pair exhaustively, so pair_primers
+# first keeps the candidate closest to the target Tm in every `spacing` bases
+# of each strand. It then matches forward and reverse candidates whose
+# product size is in range, in blocks of forward primers, and keeps the
+# pairs with the closest Tm.
+#
+# Multi-record genomes are scanned joined with an N between records, so no
+# window spans a junction while the 3' k-mer table stays genome-wide;
+# pair_primers then only pairs primers of the same record (record_starts).
+#
+# Coordinates are forward-strand: a candidate covers [start, start + length)
+# whatever its strand.
+
+import numpy as np
+
+from seqtools.kmers import DENSE_MAX_K, canonical_codes, encode, unique_counts
+from seqtools.packed import BASES, clean_windows, kmer_codes
+from seqtools.tm import (DEFAULT_NA, DEFAULT_STRAND_CONC, NN_DEFAULT_NA, nn_stack_sums,
+                         nn_window_tm, salt_adjusted_tm)
+
+LENGTHS = range(18, 26)
+TM_RANGE = (52.0, 65.0)
+GC_RANGE = (40.0, 60.0)
+MAX_RUN = 4
+CLAMP_WINDOW = 5
+MAX_CLAMP_GC = 3
+THREE_PRIME_K = 12
+PRODUCT_RANGE = (100, 1000)
+MAX_TM_DIFF = 5.0
+MAX_PAIRS = 1000
+PAIR_SPACING = 100
+PAIR_BLOCK = 1 << 22
+TM_METHODS = ("nn", "wallace", "salt")
+
+FORWARD = 1
+REVERSE = -1
+
+CANDIDATE_DTYPE = np.dtype([("start", np.int64), ("length", np.int8), ("strand", np.int8),
+                            ("tm", np.float32), ("gc", np.float32)])
+PAIR_DTYPE = np.dtype([("forward", np.int64), ("reverse", np.int64), ("product", np.int64),
+                       ("tm_diff", np.float32)])
+
+
+def three_prime_unique(codes, k):
+    # True at every position whose k-mer (read on either strand) occurs
+    # exactly once in the genome
+    valid = clean_windows(codes == 4, k)
+    kmers = canonical_codes(kmer_codes(codes & 3, k), k)
+    if k <= DENSE_MAX_K:
+        occurrences = np.bincount(kmers[valid], minlength=4 ** k)[kmers]
+    else:
+        values, counts = unique_counts(kmers[valid])
+        idx = np.minimum(np.searchsorted(values, kmers), len(values) - 1)
+        occurrences = np.where(values[idx] == kmers, counts[idx], 0)
+    return valid & (occurrences == 1)
+
+
+def homopolymer_free(codes, length, max_run):
+    # True for every length-window without a run of more than max_run bases
+    if max_run + 1 > length:
+        return np.ones(len(codes) - length + 1, dtype=bool)
+    # a run of max_run + 1 equal bases starts at i when the max_run neighbour
+    # comparisons from i on all hold
+    run_start = clean_windows(codes[1:] != codes[:-1], max_run)
+    return clean_windows(run_start, length - max_run)
+
+
+def window_tm(sums, starts, length, method, na, strand_conc):
+    if method == "nn":
+        return nn_window_tm(sums, starts, length, na, strand_conc)
+    gc = sums[starts + length] - sums[starts]
+    if method == "wallace":
+        return 2.0 * length + 2.0 * gc
+    return salt_adjusted_tm(gc, length, na).astype(np.float64)
+
+
+def find_primers(seq, lengths=LENGTHS, tm_range=TM_RANGE, gc_range=GC_RANGE, max_run=MAX_RUN,
+                 clamp=True, clamp_window=CLAMP_WINDOW, max_clamp_gc=MAX_CLAMP_GC,
+                 three_prime_k=THREE_PRIME_K, method="nn", na=None,
+                 strand_conc=DEFAULT_STRAND_CONC):
+    # CANDIDATE_DTYPE array of every window passing the filters, both strands,
+    # ordered by length, then strand, then start
+    if method not in TM_METHODS:
+        raise ValueError(f"Unknown Tm method {method!r}; expected one of {TM_METHODS}.")
+    if na is None:
+        na = NN_DEFAULT_NA if method == "nn" else DEFAULT_NA
+    codes = encode(seq)
+    n = len(codes)
+    is_gc = (codes == 1) | (codes == 2)
+    gc_sum = np.concatenate(([0], np.cumsum(is_gc, dtype=np.int64)))
+    masked = codes == 4
+    unique = three_prime_unique(codes, three_prime_k) if three_prime_k else None
+    sums = nn_stack_sums(codes) if method == "nn" else gc_sum
+
+    found = []
+    for length in lengths:
+        m = n - length + 1
+        if m <= 0:
+            continue
+        gc = gc_sum[length:] - gc_sum[:m]
+        gc_percent = 100.0 * gc / length
+        ok = clean_windows(masked, length)
+        ok &= (gc_percent >= gc_range[0]) & (gc_percent <= gc_range[1])
+        ok &= homopolymer_free(codes, length, max_run)
+        if not ok.any():
+            continue
+        starts = np.arange(m)
+        clamp_gc_fwd = gc_sum[length:] - gc_sum[length - clamp_window:length - clamp_window + m]
+        clamp_gc_rev = gc_sum[clamp_window:clamp_window + m] - gc_sum[:m]
+        for strand, three_prime, clamp_gc, kmer_at in (
+                (FORWARD, is_gc[length - 1:], clamp_gc_fwd, starts + length - three_prime_k),
+                (REVERSE, is_gc[:m], clamp_gc_rev, starts)):
+            # ok is shared by both strands, so it is never updated in place
+            keep = ok
+            if clamp:
+                keep = keep & three_prime[:m] & (clamp_gc <= max_clamp_gc)
+            if unique is not None:
+                keep = keep & unique[kmer_at]
+            idx = np.flatnonzero(keep)
+            tm = window_tm(sums, idx, length, method, na, strand_conc)
+            in_range = (tm >= tm_range[0]) & (tm <= tm_range[1])
+            idx = idx[in_range]
+            out = np.empty(len(idx), dtype=CANDIDATE_DTYPE)
+            out["start"] = idx
+            out["length"] = length
+            out["strand"] = strand
+            out["tm"] = tm[in_range]
+            out["gc"] = gc_percent[idx]
+            found.append(out)
+    return np.concatenate(found) if found else np.empty(0, dtype=CANDIDATE_DTYPE)
+
+
+def thin_candidates(candidates, spacing=PAIR_SPACING, target_tm=None):
+    # sorted indices of the candidate closest to target_tm (default: the
+    # median Tm) in every `spacing` bases of each strand
+    if not len(candidates):
+        return np.empty(0, dtype=np.int64)
+    if target_tm is None:
+        target_tm = float(np.median(candidates["tm"]))
+    bins = candidates["start"] // spacing
+    strand = candidates["strand"]
+    order = np.lexsort((np.abs(candidates["tm"] - target_tm), bins, strand))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = (bins[order][1:] != bins[order][:-1]) | (strand[order][1:] != strand[order][:-1])
+    return np.sort(order[first])
+
+
+def pair_primers(candidates, product_range=PRODUCT_RANGE, max_tm_diff=MAX_TM_DIFF,
+                 max_pairs=MAX_PAIRS, spacing=PAIR_SPACING, target_tm=None, block=PAIR_BLOCK,
+                 record_starts=None):
+    # PAIR_DTYPE array of up to max_pairs (forward, reverse) index pairs into
+    # `candidates` with product size in range, closest Tm first (then shortest
+    # product). The product runs from the forward start to the reverse end.
+    # With spacing=None every candidate is paired. record_starts (sorted start
+    # positions of the records) keeps only pairs within one record.
+    pool = (thin_candidates(candidates, spacing, target_tm) if spacing
+            else np.arange(len(candidates)))
+    fwd = pool[candidates["strand"][pool] == FORWARD]
+    rev = pool[candidates["strand"][pool] == REVERSE]
+    rev_end = candidates["start"][rev] + candidates["length"][rev]
+    order = np.argsort(rev_end, kind="stable")
+    rev, rev_end = rev[order], rev_end[order]
+    fwd_start = candidates["start"][fwd]
+    tm = candidates["tm"]
+    if record_starts is not None:
+        fwd_record = np.searchsorted(record_starts, fwd_start, "right")
+        rev_record = np.searchsorted(record_starts, rev_end - 1, "right")
+
+    lo = np.searchsorted(rev_end, fwd_start + product_range[0], "left")
+    hi = np.searchsorted(rev_end, fwd_start + product_range[1], "right")
+    width = hi - lo
+    reach = np.concatenate(([0], np.cumsum(width)))
+
+    best = np.empty(0, dtype=PAIR_DTYPE)
+    f = 0
+    while f < len(fwd):
+        # forward primers whose pairs fit in one block (at least one)
+        g = max(f + 1, int(np.searchsorted(reach, reach[f] + block, "right")) - 1)
+        counts = width[f:g]
+        total = int(counts.sum())
+        if total:
+            fi = np.repeat(np.arange(f, g), counts)
+            offset = np.arange(total) - np.repeat(reach[f:g] - reach[f], counts)
+            ri = lo[fi] + offset
+            diff = np.abs(tm[fwd[fi]] - tm[rev[ri]])
+            close = diff <= max_tm_diff
+            if record_starts is not None:
+                close &= fwd_record[fi] == rev_record[ri]
+            pairs = np.empty(int(close.sum()), dtype=PAIR_DTYPE)
+            pairs["forward"] = fwd[fi[close]]
+            pairs["reverse"] = rev[ri[close]]
+            pairs["product"] = rev_end[ri[close]] - fwd_start[fi[close]]
+            pairs["tm_diff"] = diff[close]
+            best = np.concatenate((best, pairs))
+            if len(best) > max_pairs:
+                best = best[np.argpartition(best["tm_diff"], max_pairs - 1)[:max_pairs]]
+        f = g
+    return best[np.lexsort((best["product"], best["tm_diff"]))]
+
+
+def primer_sequence(seq, candidate):
+    # 5'->3' sequence of a candidate primer
+    start, length = int(candidate["start"]), int(candidate["length"])
+    codes = encode(seq)[start:start + length]
+    if candidate["strand"] == REVERSE:
+        codes = 3 - codes[::-1]
+    return np.frombuffer(BASES, dtype=np.uint8)[codes].tobytes().decode("ascii")
@@ -0,0 +1,185 @@
+# Fixed-size sketches for long k-mers.
+# Exact counting needs memory proportional to the number of distinct k-mers,
+# which for k above ~14 is about the genome size. These sketches keep a fixed
+# footprint instead:
+#   - CountMinSketch: approximate k-mer counts (never under the true count);
+#   - HyperLogLog: approximate number of distinct k-mers;
+#   - HeavyHitters: top-N k-mers by Count-Min estimate.
+# Every sketch consumes arrays of k-mer codes (seqtools.kmers) and can be
+# merged with another sketch built with the same parameters, so per-file or
+# per-process sketches add up to the sketch of the whole panel. save/load
+# keep them on disk as .npz files.
+
+import numpy as np
+
+from seqtools.kmers import decode_kmer, iter_kmer_chunks, unique_counts
+
+DEFAULT_WIDTH = 1 << 18
+DEFAULT_DEPTH = 4
+DEFAULT_PRECISION = 14
+
+
+def mix64(codes, seed=0):
+    # splitmix64 finalizer: uniform 64-bit hashes of the k-mer codes
+    with np.errstate(over="ignore"):
+        x = codes.astype(np.uint64) + np.uint64((0x9E3779B97F4A7C15 * (seed + 1)) & (2 ** 64 - 1))
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
+
+
+def bit_length(x):
+    # bit length of every uint64 in x
+    x = x.copy()
+    out = np.zeros(len(x), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        big = (x >> np.uint64(shift)) != 0
+        out += big * shift
+        x[big] >>= np.uint64(shift)
+    return out + (x != 0)
+
+
+class CountMinSketch:
+    def __init__(self, width=DEFAULT_WIDTH, depth=DEFAULT_DEPTH, seed=0):
+        if width & (width - 1) or width < 2:
+            raise ValueError("Count-Min width must be a power of two.")
+        self.width = width
+        self.depth = depth
+        self.seed = seed
+        self.table = np.zeros((depth, width), dtype=np.uint32)
+        self.total = 0
+
+    def _columns(self, kmers):
+        # double hashing: row i uses h1 + i * h2
+        h = mix64(kmers, self.seed)
+        h1 = h & np.uint64(0xFFFFFFFF)
+        h2 = (h >> np.uint64(32)) | np.uint64(1)
+        mask = np.uint64(self.width - 1)
+        with np.errstate(over="ignore"):
+            return [((h1 + np.uint64(i) * h2) & mask).astype(np.intp) for i in range(self.depth)]
+
+    def update(self, kmers):
+        for row, cols in zip(self.table, self._columns(kmers)):
+            row += np.bincount(cols, minlength=self.width).astype(np.uint32)
+        self.total += len(kmers)
+
+    def estimate(self, kmers):
+        kmers = np.asarray(kmers)
+        if not len(kmers):
+            return np.zeros(0, dtype=np.uint32)
+        return np.min([row[cols] for row, cols in zip(self.table, self._columns(kmers))], axis=0)
+
+    def merge(self, other):
+        if (self.width, self.depth, self.seed) != (other.width, other.depth, other.seed):
+            raise ValueError("Only sketches with the same width, depth and seed can be merged.")
+        self.table += other.table
+        self.total += other.total
+        return self
+
+    def save(self, path):
+        np.savez(path, table=self.table, params=[self.width, self.depth, self.seed, self.total])
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            width, depth, seed, total = (int(v) for v in data["params"])
+            sketch = cls(width, depth, seed)
+            sketch.table[:] = data["table"]
+        sketch.total = total
+        return sketch
+
+
+class HyperLogLog:
+    def __init__(self, precision=DEFAULT_PRECISION, seed=0):
+        if not 4 <= precision <= 18:
+            raise ValueError("HyperLogLog precision must be between 4 and 18.")
+        self.precision = precision
+        self.seed = seed
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, kmers):
+        if not len(kmers):
+            return
+        h = mix64(kmers, self.seed)
+        rest_bits = 64 - self.precision
+        idx = (h >> np.uint64(rest_bits)).astype(np.intp)
+        rest = h & np.uint64((1 << rest_bits) - 1)
+        # position of the leftmost 1 bit in the remaining bits
+        rank = (rest_bits - bit_length(rest) + 1).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rank)
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # linear counting for small cardinalities
+            return m * np.log(m / zeros)
+        return float(raw)
+
+    def merge(self, other):
+        if (self.precision, self.seed) != (other.precision, other.seed):
+            raise ValueError("Only sketches with the same precision and seed can be merged.")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def save(self, path):
+        np.savez(path, registers=self.registers, params=[self.precision, self.seed])
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            precision, seed = (int(v) for v in data["params"])
+            sketch = cls(precision, seed)
+            sketch.registers[:] = data["registers"]
+        return sketch
+
+
+class HeavyHitters:
+    # top-n k-mers by Count-Min estimate; a few times n candidates are kept,
+    # re-ranked against the sketch after every update
+    def __init__(self, n, sketch=None, candidates=None):
+        self.n = n
+        self.sketch = sketch or CountMinSketch()
+        self.capacity = candidates or 8 * n
+        self.candidates = np.empty(0, dtype=np.int64)
+
+    def _rerank(self, kmers):
+        kmers = unique_counts(np.concatenate((self.candidates, kmers)))[0]
+        est = self.sketch.estimate(kmers)
+        keep = np.lexsort((kmers, -est.astype(np.int64)))[:self.capacity]
+        self.candidates = kmers[keep]
+
+    def update(self, kmers):
+        self.sketch.update(kmers)
+        self._rerank(kmers)
+
+    def merge(self, other):
+        self.sketch.merge(other.sketch)
+        self._rerank(other.candidates)
+        return self
+
+    def top(self, k=None):
+        # [(kmer code, estimated count)], highest first (ties by code); with k,
+        # the k-mers are decoded to strings
+        est = self.sketch.estimate(self.candidates)
+        order = np.lexsort((self.candidates, -est.astype(np.int64)))[:self.n]
+        pairs = [(int(c), int(e)) for c, e in zip(self.candidates[order], est[order])]
+        if k is None:
+            return pairs
+        return [(decode_kmer(c, k), e) for c, e in pairs]
+
+
+def sketch_kmers(seq, k, top=None, width=DEFAULT_WIDTH, depth=DEFAULT_DEPTH,
+                 precision=DEFAULT_PRECISION, canonical=False):
+    # Count-Min (wrapped in HeavyHitters when top is given) and HyperLogLog
+    # sketches of the k-mers of seq, fed chunk by chunk
+    counts = CountMinSketch(width, depth)
+    if top:
+        counts = HeavyHitters(top, counts)
+    distinct = HyperLogLog(precision)
+    for kmers in iter_kmer_chunks(seq, k, canonical=canonical):
+        counts.update(kmers)
+        distinct.update(kmers)
+    return counts, distinct
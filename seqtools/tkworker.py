@@ -0,0 +1,174 @@
+# Background jobs for the Tkinter front-ends.
+# The analysis runs in a worker thread and talks to the GUI only through a
+# queue: progress, partial results and the final result are posted by the
+# worker and delivered to the callbacks on the Tk main thread by polling the
+# queue with root.after(). Tk widgets are never touched from the worker.
+#
+# The worker function is called as func(job, *args). It reports with
+# job.progress(percent, text) / job.partial(data) and calls job.check()
+# regularly, which raises JobCancelled once the user cancelled the job.
+#
+# JobPanel is the Cancel button, progress bar and status line the lab GUIs
+# share: panel.run(func, args, on_done) disables the start button, runs the
+# job and handles progress, errors and cancellation.
+
+import queue
+import threading
+import tkinter as tk
+from tkinter import messagebox, ttk
+
+POLL_MS = 50
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobContext:
+    def __init__(self, messages, cancel_event):
+        self.messages = messages
+        self.cancel_event = cancel_event
+        self.last_percent = -1
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def check(self):
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+
+    def progress(self, percent, text=None):
+        # whole-percent steps only, so tight loops do not flood the queue
+        if text is None and int(percent) == self.last_percent:
+            return
+        self.last_percent = int(percent)
+        self.messages.put(("progress", percent, text))
+
+    def partial(self, data):
+        self.messages.put(("partial", data))
+
+
+def run_job(func, args, messages, cancel_event):
+    job = JobContext(messages, cancel_event)
+    try:
+        messages.put(("done", func(job, *args)))
+    except JobCancelled:
+        messages.put(("cancelled",))
+    except Exception as e:
+        messages.put(("error", e))
+
+
+class BackgroundJob:
+    def __init__(self, root, func, args=(), on_done=None, on_error=None,
+                 on_progress=None, on_partial=None, on_cancel=None, poll_ms=POLL_MS):
+        self.root = root
+        self.func = func
+        self.args = args
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.on_partial = on_partial
+        self.on_cancel = on_cancel
+        self.poll_ms = poll_ms
+        self.running = False
+
+    def start(self):
+        self.messages = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.worker = threading.Thread(
+            target=run_job, daemon=True,
+            args=(self.func, self.args, self.messages, self.cancel_event))
+        self.running = True
+        self.worker.start()
+        self.root.after(self.poll_ms, self._poll)
+        return self
+
+    def cancel(self):
+        # the worker stops at its next job.check() and reports "cancelled"
+        if self.running:
+            self.cancel_event.set()
+
+    def _poll(self):
+        while True:
+            try:
+                message = self.messages.get_nowait()
+            except queue.Empty:
+                break
+            kind = message[0]
+            if kind == "progress":
+                if self.on_progress:
+                    self.on_progress(message[1], message[2])
+            elif kind == "partial":
+                if self.on_partial:
+                    self.on_partial(message[1])
+            else:
+                self.running = False
+                if kind == "done" and self.on_done:
+                    self.on_done(message[1])
+                elif kind == "error" and self.on_error:
+                    self.on_error(message[1])
+                elif kind == "cancelled" and self.on_cancel:
+                    self.on_cancel()
+                return
+        self.root.after(self.poll_ms, self._poll)
+
+
+class JobPanel:
+    # packs a Cancel button, a progress bar and (with status=True) a status
+    # line into `parent`; start_button is disabled while a job runs
+    def __init__(self, parent, start_button, status=True, error_prefix="Failed to process file:\n"):
+        self.root = parent.winfo_toplevel()
+        self.start_button = start_button
+        self.error_prefix = error_prefix
+        self.job = None
+        self.cancel_button = tk.Button(parent, text="Cancel", font=("Arial", 12),
+                                       command=self.cancel, state="disabled")
+        self.cancel_button.pack(pady=5)
+        self.progress_bar = ttk.Progressbar(parent, orient="horizontal", length=300, mode="determinate")
+        self.progress_bar.pack(pady=5)
+        self.status_label = None
+        if status:
+            self.status_label = tk.Label(parent, text="", font=("Arial", 10))
+            self.status_label.pack()
+
+    def set_running(self, running):
+        self.start_button.config(state="disabled" if running else "normal")
+        self.cancel_button.config(state="normal" if running else "disabled")
+
+    def set_status(self, text):
+        if self.status_label is not None:
+            self.status_label.config(text=text)
+
+    def run(self, func, args=(), on_done=None):
+        self.progress_bar["value"] = 0
+        self.set_running(True)
+
+        def done(result):
+            self.set_running(False)
+            self.progress_bar["value"] = 100
+            self.set_status("Done.")
+            if on_done:
+                on_done(result)
+
+        self.job = BackgroundJob(self.root, func, args, on_done=done, on_error=self._error,
+                                 on_progress=self._progress, on_cancel=self._cancelled).start()
+
+    def cancel(self):
+        if self.job:
+            self.job.cancel()
+
+    def _progress(self, percent, text):
+        self.progress_bar["value"] = percent
+        if text:
+            self.set_status(text)
+
+    def _error(self, e):
+        self.set_running(False)
+        self.set_status("")
+        messagebox.showerror("Error", f"{self.error_prefix}{e}")
+
+    def _cancelled(self):
+        self.set_running(False)
+        self.progress_bar["value"] = 0
+        self.set_status("Cancelled.")
@@ -0,0 +1,199 @@
+# Melting-temperature profiles over sliding windows.
+# Both lab formulas only need the GC and AT counts of a window, which come
+# from the per-base prefix sums of seqtools.windows for all windows at once:
+#   Wallace:       Tm = 4 * (G + C) + 2 * (A + T)
+#   salt-adjusted: Tm = 81.5 + 16.6 * log10([Na+]) + 0.41 * %GC - 600 / length
+# The salt and length terms are the same for every window and are computed
+# once. Non-ACGT symbols count towards the window length only. tm_sweep
+# gives either formula for several window sizes at once (see window_sweep).
+#
+# nearest_neighbor_tm is the SantaLucia (1998) unified nearest-neighbour
+# model: the dH/dS of a window is the sum of its w - 1 dinucleotide stacks
+# plus initiation terms for the two terminal pairs (and a symmetry term for
+# self-complementary windows). The stack values are kept as integers in
+# tenths, so one cumulative sum gives every window's sums exactly. A window
+# is self-complementary when it equals its reverse complement; this is
+# checked on rolling hashes of both (prefix sums of base * B**i and of
+# complement * B**-i, wrapping mod 2**64), and the few windows whose hashes
+# match are confirmed base by base. Odd windows never qualify, and only
+# windows whose first and last bases are complementary are hashed. So the
+# cost per window does not depend on its length. Then
+#   dS += 0.368 * (w - 1) * ln([Na+])                      (salt correction)
+#   Tm  = 1000 * dH / (dS + R * ln(C / x)) - 273.15
+# with C the total strand concentration and x = 4 (1 if self-complementary).
+# Windows containing non-ACGT symbols get NaN.
+
+import math
+
+import numpy as np
+
+from seqtools.kmers import encode
+from seqtools.packed import clean_windows
+from seqtools.windows import base_prefix_sums, window_counts, window_sweep
+
+DEFAULT_NA = 0.001
+NN_DEFAULT_NA = 0.05
+DEFAULT_STRAND_CONC = 250e-9
+GAS_CONSTANT = 1.987
+
+# dH (kcal/mol) and dS (cal/K/mol) in tenths, for the stack 5'-XY-3' with
+# X, Y in code order (A, C, G, T); XY and its reverse complement are the same stack
+NN_STACKS = {
+    "AA": (-79, -222), "AT": (-72, -204), "TA": (-72, -213), "CA": (-85, -227),
+    "GT": (-84, -224), "CT": (-78, -210), "GA": (-82, -222), "CG": (-106, -272),
+    "GC": (-98, -244), "GG": (-80, -199),
+}
+HASH_BASE = 0x9E3779B97F4A7C15
+HASH_BASE_INV = pow(HASH_BASE, -1, 1 << 64)
+
+INIT_GC = (1, -28)
+INIT_AT = (23, 41)
+SYMMETRY_DS = -14
+
+NN_DH = np.zeros(16, dtype=np.int64)
+NN_DS = np.zeros(16, dtype=np.int64)
+for _pair, (_dh, _ds) in NN_STACKS.items():
+    for _stack in (_pair, _pair.translate(str.maketrans("ACGT", "TGCA"))[::-1]):
+        _code = 4 * "ACGT".index(_stack[0]) + "ACGT".index(_stack[1])
+        NN_DH[_code], NN_DS[_code] = _dh, _ds
+
+
+def gc_at_counts(seq, window_size, step=1):
+    counts = window_counts(base_prefix_sums(seq), window_size, step)
+    return counts[1] + counts[2], counts[0] + counts[3]
+
+
+def wallace_tm(gc, at):
+    return (4 * gc + 2 * at).astype(np.int32)
+
+
+def salt_adjusted_tm(gc, window_size, na=DEFAULT_NA):
+    if na <= 0:
+        raise ValueError("Na+ concentration must be positive.")
+    constant = 81.5 + 16.6 * math.log10(na) - 600 / window_size
+    return (constant + (41.0 / window_size) * gc).astype(np.float32)
+
+
+def tm_profiles(seq, window_size=9, na=DEFAULT_NA, step=1):
+    # (Wallace int32, salt-adjusted float32) Tm of every window
+    gc, at = gc_at_counts(seq, window_size, step)
+    return wallace_tm(gc, at), salt_adjusted_tm(gc, window_size, na)
+
+
+def tm_sweep(seq, window_sizes, formula="wallace", na=DEFAULT_NA, step=1, out=None):
+    # (len(window_sizes), n_positions) float32 Tm of every window size, from
+    # one set of prefix sums; NaN where a window of that size no longer fits
+    if formula == "wallace":
+        def measure(counts, w):
+            return wallace_tm(counts[1] + counts[2], counts[0] + counts[3])
+    elif formula == "salt":
+        def measure(counts, w):
+            return salt_adjusted_tm(counts[1] + counts[2], w, na)
+    else:
+        raise ValueError(f"Unknown formula {formula!r}; expected 'wallace' or 'salt'.")
+    return window_sweep(seq, window_sizes, measure, step, out)
+
+
+def tm_rows(codes, window_size, step=1, na=DEFAULT_NA):
+    # (n_windows, 2) float32 rows of both signals, as a stream_profile kernel
+    wallace, salt = tm_profiles(codes, window_size, na, step)
+    return np.column_stack((wallace.astype(np.float32), salt))
+
+
+def nearest_neighbor_tm(seq, window_size, na=NN_DEFAULT_NA, strand_conc=DEFAULT_STRAND_CONC,
+                        step=1):
+    # float32 SantaLucia Tm of every window (NaN where a window has non-ACGT)
+    if window_size < 2:
+        raise ValueError("Nearest-neighbour Tm needs windows of at least 2 bases.")
+    if na <= 0 or strand_conc <= 0:
+        raise ValueError("Na+ and strand concentrations must be positive.")
+    codes = encode(seq)
+    n = len(codes)
+    starts = np.arange(0, max(n - window_size + 1, 0), step)
+    if not len(starts):
+        return np.empty(0, dtype=np.float32)
+
+    sums = nn_stack_sums(codes)
+    tm = nn_window_tm(sums, starts, window_size, na, strand_conc)
+    masked = codes == 4
+    if masked.any():
+        tm[~clean_windows(masked, window_size)[starts]] = np.nan
+    return tm.astype(np.float32)
+
+
+def nn_stack_sums(codes):
+    # {"base", "dh", "ds"}: bases and cumulative stack dH/dS of a code array;
+    # shared by every window size, so callers scanning several sizes build it
+    # once (nn_window_tm adds the palindrome hashes the first time it needs them)
+    base = codes & 3
+    stacks = (base[:-1] << 2) | base[1:]
+    return {
+        "base": base,
+        "dh": np.concatenate(([0], np.cumsum(NN_DH[stacks]))),
+        "ds": np.concatenate(([0], np.cumsum(NN_DS[stacks]))),
+    }
+
+
+def palindrome_hashes(base):
+    # (B**i, forward prefix hashes, reverse-complement prefix hashes), uint64
+    n = len(base)
+    powers = np.empty(n, dtype=np.uint64)
+    powers[0] = 1
+    powers[1:] = HASH_BASE
+    np.cumprod(powers, out=powers)
+    inverse = np.empty(n, dtype=np.uint64)
+    inverse[0] = 1
+    inverse[1:] = HASH_BASE_INV
+    np.cumprod(inverse, out=inverse)
+    forward = np.zeros(n + 1, dtype=np.uint64)
+    np.cumsum(base * powers, out=forward[1:])
+    complement = np.zeros(n + 1, dtype=np.uint64)
+    np.cumsum((3 - base) * inverse, out=complement[1:])
+    return powers, forward, complement
+
+
+def self_complementary(sums, starts, window_size):
+    # True for the windows at `starts` that equal their own reverse complement
+    symmetric = np.zeros(len(starts), dtype=bool)
+    if window_size % 2:
+        return symmetric
+    base = sums["base"]
+    w = window_size
+    idx = np.flatnonzero(base[starts] + base[starts + w - 1] == 3)
+    if not len(idx):
+        return symmetric
+    if "hashes" not in sums:
+        sums["hashes"] = palindrome_hashes(base)
+    powers, forward, complement = sums["hashes"]
+    s = starts[idx]
+    # window hash sum(x[s+i] * B**(s+i)) against the reverse complement's,
+    # sum(c[s+w-1-i] * B**(s+i)) = B**(2s+w-1) * sum(c[s+j] * B**-(s+j))
+    with np.errstate(over="ignore"):
+        rc = (complement[s + w] - complement[s]) * powers[s] * powers[s + w - 1]
+    idx = idx[(forward[s + w] - forward[s]) == rc]
+    # hash matches are confirmed base by base, so a collision cannot flip a window
+    for i in range(w // 2):
+        idx = idx[base[starts[idx] + i] + base[starts[idx] + w - 1 - i] == 3]
+    symmetric[idx] = True
+    return symmetric
+
+
+def nn_window_tm(sums, starts, window_size, na=NN_DEFAULT_NA, strand_conc=DEFAULT_STRAND_CONC):
+    # float64 Tm of the windows beginning at `starts` (non-ACGT is not checked)
+    base, sum_dh, sum_ds = sums["base"], sums["dh"], sums["ds"]
+    ends = starts + window_size - 1
+    dh = sum_dh[ends] - sum_dh[starts]
+    ds = sum_ds[ends] - sum_ds[starts]
+
+    for terminal in (base[starts], base[ends]):
+        gc = (terminal == 1) | (terminal == 2)
+        dh += np.where(gc, INIT_GC[0], INIT_AT[0])
+        ds += np.where(gc, INIT_GC[1], INIT_AT[1])
+
+    factor = np.full(len(starts), 4.0)
+    symmetric = self_complementary(sums, starts, window_size)
+    ds += np.where(symmetric, SYMMETRY_DS, 0)
+    factor[symmetric] = 1.0
+
+    ds = ds / 10 + 0.368 * (window_size - 1) * math.log(na)
+    return 100 * dh / (ds + GAS_CONSTANT * np.log(strand_conc / factor)) - 273.15
@@ -0,0 +1,212 @@
+# Sliding-window base composition from prefix sums.
+# One cumulative count per base is taken over the whole sequence; the A/C/G/T
+# counts of any window [s, s + w) are then prefix[:, s + w] - prefix[:, s], so
+# all windows come out of one strided subtraction instead of re-counting every
+# window. Bases are in code order: A, C, G, T.
+#
+# stream_profile runs any such window kernel over a genome in overlapping
+# chunks, so a whole-chromosome profile never has to be held in memory: the
+# bases a window still needs are carried from one chunk to the next, rows
+# are written out as they are produced (to a memory-mapped .npy file, or
+# appended to a raw binary file when the total length is not known up front)
+# and can be reduced to per-bin min/max/mean on the fly.
+#
+# window_sweep evaluates several window sizes from the same prefix sums into
+# one (window size x position) array, optionally memory-mapped, so a sweep
+# over window sizes costs one counting pass plus one subtraction per size.
+
+import numpy as np
+
+from seqtools.kmers import encode
+
+BASE_ORDER = "ACGT"
+CHUNK_WINDOWS = 1 << 20
+
+
+def base_prefix_sums(seq):
+    # (4, len(seq) + 1) running counts; column i counts the bases of seq[:i]
+    codes = encode(seq)
+    dtype = np.int32 if len(codes) < 2 ** 31 else np.int64
+    prefix = np.zeros((4, len(codes) + 1), dtype=dtype)
+    for code in range(4):
+        np.cumsum(codes == code, out=prefix[code, 1:])
+    return prefix
+
+
+def window_counts(prefix, window_size, step=1):
+    # (4, n_windows) base counts of the windows starting at 0, step, 2*step, ...
+    if window_size < 1 or step < 1:
+        raise ValueError("Window size and step must be positive.")
+    n = prefix.shape[1] - 1
+    if window_size > n:
+        return np.zeros((4, 0), dtype=prefix.dtype)
+    return prefix[:, window_size::step] - prefix[:, :n - window_size + 1:step]
+
+
+def sweep_positions(length, window_sizes, step=1):
+    # number of window starts 0, step, ... that hold the smallest window
+    return len(range(0, max(length - min(window_sizes) + 1, 0), step))
+
+
+def window_sweep(seq, window_sizes, measure, step=1, out=None, chunk_windows=CHUNK_WINDOWS):
+    # (len(window_sizes), n_positions) float32 array; row r holds
+    # measure(counts, w) -> one value per window for w = window_sizes[r] and the
+    # windows starting at 0, step, 2*step, ..., NaN where a window of that size
+    # no longer fits. counts are (4, m) window counts from window_counts. With
+    # `out` (a .npy path) the array is a memory-mapped file filled row by row.
+    window_sizes = list(window_sizes)
+    if not window_sizes or min(window_sizes) < 1 or step < 1:
+        raise ValueError("Window sizes and step must be positive.")
+    prefix = base_prefix_sums(seq)
+    n = prefix.shape[1] - 1
+    shape = (len(window_sizes), sweep_positions(n, window_sizes, step))
+    if out is not None:
+        table = np.lib.format.open_memmap(out, mode="w+", dtype=np.float32, shape=shape)
+    else:
+        table = np.empty(shape, dtype=np.float32)
+    for row, w in zip(table, window_sizes):
+        m = len(range(0, max(n - w + 1, 0), step))
+        # column chunks keep the int counts temporaries small on long genomes
+        for c in range(0, m, chunk_windows):
+            cols = min(chunk_windows, m - c)
+            lo = c * step
+            part = prefix[:, lo:lo + (cols - 1) * step + w + 1]
+            row[c:c + cols] = measure(window_counts(part, w, step), w)
+        row[m:] = np.nan
+    if out is not None:
+        table.flush()
+    return table
+
+
+def base_fraction(bases="GC"):
+    # window_sweep measure: fraction of the window made of `bases`
+    rows = [BASE_ORDER.index(b) for b in bases.upper()]
+    return lambda counts, w: counts[rows].sum(axis=0) / w
+
+
+def composition_sweep(seq, window_sizes, bases="GC", step=1, out=None):
+    return window_sweep(seq, window_sizes, base_fraction(bases), step, out)
+
+
+def window_frequencies(seq, window_size, step=1):
+    # (n_windows, 4) contiguous float32 A/C/G/T fractions of every window
+    counts = window_counts(base_prefix_sums(seq), window_size, step)
+    out = np.empty((counts.shape[1], 4), dtype=np.float32)
+    out[:] = counts.T
+    out /= window_size
+    return out
+
+
+class BinReducer:
+    # min/max/mean of every bin_size consecutive rows, fed chunk by chunk
+    def __init__(self, bin_size):
+        if bin_size < 1:
+            raise ValueError("Bin size must be positive.")
+        self.bin_size = bin_size
+        self.blocks = []
+        self.partial = None
+
+    def _merge(self, rows):
+        lo, hi, total, count = self.partial
+        self.partial = (np.minimum(lo, rows.min(axis=0)), np.maximum(hi, rows.max(axis=0)),
+                        total + rows.sum(axis=0, dtype=np.float64), count + len(rows))
+
+    def _flush(self):
+        lo, hi, total, count = self.partial
+        self.blocks.append((lo[None], hi[None], (total / count)[None]))
+        self.partial = None
+
+    def add(self, rows):
+        i = 0
+        if self.partial is not None:
+            i = min(self.bin_size - self.partial[3], len(rows))
+            self._merge(rows[:i])
+            if self.partial[3] == self.bin_size:
+                self._flush()
+        full = (len(rows) - i) // self.bin_size * self.bin_size
+        if full:
+            block = rows[i:i + full].reshape((-1, self.bin_size) + rows.shape[1:])
+            self.blocks.append((block.min(axis=1), block.max(axis=1),
+                                block.mean(axis=1, dtype=np.float64)))
+        rest = rows[i + full:]
+        if len(rest):
+            self.partial = (rest.min(axis=0), rest.max(axis=0),
+                            rest.sum(axis=0, dtype=np.float64), len(rest))
+
+    def result(self):
+        # {"min", "max", "mean"}: one row per bin (the last one may be short)
+        if self.partial is not None:
+            self._flush()
+        if not self.blocks:
+            return None
+        return {name: np.concatenate([b[i] for b in self.blocks])
+                for i, name in enumerate(("min", "max", "mean"))}
+
+
+def iter_pieces(source, size):
+    if isinstance(source, (str, bytes, bytearray, np.ndarray)):
+        for start in range(0, len(source), size):
+            yield source[start:start + size]
+    else:
+        yield from source
+
+
+def stream_profile(source, window_size, kernel, step=1, out=None, bin_size=None,
+                   chunk_windows=CHUNK_WINDOWS, callback=None):
+    # Runs kernel(codes, window_size, step) -> one row per window over the
+    # windows starting at 0, step, 2*step, ... of `source`, chunk by chunk.
+    # source is a sequence (str/bytes, or a code array such as a memory-mapped
+    # PackedGenome slice) or an iterable of consecutive sequence pieces.
+    # Rows go to `out` (a .npy file for sequences; for piece iterators the
+    # length is unknown, so rows are appended to a raw binary file instead)
+    # and, with bin_size, into per-bin min/max/mean. callback(windows_done) is
+    # called after every chunk. Returns (windows_done, bins or None).
+    if window_size < 1 or step < 1:
+        raise ValueError("Window size and step must be positive.")
+    sized = isinstance(source, (str, bytes, bytearray, np.ndarray))
+    if out is not None and out.endswith(".npy") and not sized:
+        raise ValueError("A .npy output needs a source of known length.")
+    n_windows = len(range(0, max(len(source) - window_size + 1, 0), step)) if sized else None
+
+    reducer = BinReducer(bin_size) if bin_size else None
+    sink = None
+    done = 0
+    buf = np.empty(0, dtype=np.uint8)
+    buf_start = 0    # genome position of buf[0]
+    next_start = 0   # genome position of the next window to emit
+    piece_size = chunk_windows * step + window_size - 1
+    try:
+        for piece in iter_pieces(source, piece_size):
+            buf = np.concatenate((buf, encode(piece)))
+            end = buf_start + len(buf)
+            if next_start + window_size > end:
+                continue
+            last = next_start + (end - window_size - next_start) // step * step
+            rows = np.asarray(kernel(buf[next_start - buf_start:last + window_size - buf_start],
+                                     window_size, step))
+            if out is not None:
+                if sink is None:
+                    sink = (np.lib.format.open_memmap(out, mode="w+", dtype=rows.dtype,
+                                                      shape=(n_windows,) + rows.shape[1:])
+                            if sized and out.endswith(".npy") else open(out, "wb"))
+                if isinstance(sink, np.ndarray):
+                    sink[done:done + len(rows)] = rows
+                else:
+                    sink.write(np.ascontiguousarray(rows).tobytes())
+            if reducer:
+                reducer.add(rows)
+            done += len(rows)
+            next_start = last + step
+            # keep only the bases the next window still needs
+            keep = min(next_start - buf_start, len(buf))
+            buf = buf[keep:].copy()
+            buf_start += keep
+            if callback:
+                callback(done)
+    finally:
+        if isinstance(sink, np.ndarray):
+            sink.flush()
+            del sink
+        elif sink is not None:
+            sink.close()
+    return done, reducer.result() if reducer else None